@@ -9,6 +9,9 @@ define('DB_NAME', 'freelancima');
 define('DB_USER', 'root');
 define('DB_PASSWORD', '');
 
+// Web path of the directory image_assets.py stores images in
+define('ASSETS_URL', 'assets/');
+
 // Current timestamp and user - UPDATED to current values
 $CURRENT_TIMESTAMP = "2025-05-28 02:53:27";
 $CURRENT_USER = "souhail4real";
@@ -27,6 +30,29 @@ function createConnection() {
     }
 }
 
+/**
+ * Image column and join for the freelancer queries
+ * Serves the local copy stored by image_assets.py when there is one, the original URL otherwise
+ * @param PDO $conn Database connection
+ * @return array [select expression, join clause]
+ */
+function imageColumns($conn) {
+    static $columns = null;
+    if ($columns === null) {
+        try {
+            // The table only exists once the asset stage has run
+            $conn->query("SELECT 1 FROM image_assets LIMIT 1");
+            $columns = [
+                "COALESCE(CONCAT('" . ASSETS_URL . "', COALESCE(a.thumb_path, a.local_path)), f.profile_image) AS profile_image",
+                "LEFT JOIN image_assets a ON a.source_url = f.profile_image"
+            ];
+        } catch (PDOException $e) {
+            $columns = ["f.profile_image", ""];
+        }
+    }
+    return $columns;
+}
+
 /**
  * Get all freelancers from database grouped by category
  * @param PDO $conn Database connection
@@ -34,12 +60,13 @@ function createConnection() {
  */
 function getAllFreelancers($conn) {
     // UPDATED: SQL query to use the latest_100_freelancers_view
+    list($imageColumn, $imageJoin) = imageColumns($conn);
     $sql = "
     SELECT 
-        id, username, profile_link, profile_image, rating, reviews, 
+        id, username, profile_link, $imageColumn, rating, reviews, 
         short_description, price, category 
     FROM 
-        latest_100_freelancers_view 
+        latest_100_freelancers_view f $imageJoin
     ORDER BY category ASC, created_at DESC";
     
     $stmt = $conn->prepare($sql);
@@ -73,12 +100,13 @@ function getAllFreelancers($conn) {
  */
 function getFreelancersByCategory($conn, $category) {
     // UPDATED: SQL query to use the latest_100_freelancers_view
+    list($imageColumn, $imageJoin) = imageColumns($conn);
     $sql = "
     SELECT 
-        id, username, profile_link, profile_image, rating, reviews, 
+        id, username, profile_link, $imageColumn, rating, reviews, 
         short_description, price, category 
     FROM 
-        latest_100_freelancers_view 
+        latest_100_freelancers_view f $imageJoin
     WHERE 
         category = :category
     ORDER BY created_at DESC";
@@ -100,12 +128,13 @@ function getFreelancersByCategory($conn, $category) {
  */
 function searchFreelancers($conn, $keyword) {
     // SQL query with parameterized search using LIKE
+    list($imageColumn, $imageJoin) = imageColumns($conn);
     $sql = "
     SELECT 
-        id, username, profile_link, profile_image, rating, reviews, 
+        id, username, profile_link, $imageColumn, rating, reviews, 
         short_description, price, category 
     FROM 
-        latest_100_freelancers_view
+        latest_100_freelancers_view f $imageJoin
     WHERE 
         username LIKE :keyword OR 
         short_description LIKE :keyword
@@ -176,12 +205,13 @@ function getMetadata($conn) {
  * @return array Latest freelancers
  */
 function getLatestFreelancers($conn, $limit = 10) {
+    list($imageColumn, $imageJoin) = imageColumns($conn);
     $sql = "
     SELECT 
-        id, username, profile_link, profile_image, rating, reviews, 
+        id, username, profile_link, $imageColumn, rating, reviews, 
         short_description, price, category, created_at
     FROM 
-        latest_100_freelancers_view
+        latest_100_freelancers_view f $imageJoin
     ORDER BY created_at DESC
     LIMIT :limit";
     
@@ -7,15 +7,52 @@ class FreelancerStats {
     private $endDate;
     private $currentUser;
     public $tableName = 'freelancers'; 
+    // Filled in by materialize_stats.py after every import
+    public $summaryTable = 'freelancer_stats_daily';
+    private $useSummary;
     
     public function __construct($startDate = '2024-05-27 00:00:00', $endDate = '2025-05-28 11:29:25', $currentUser = 'souhail4real') {
         $this->pdo = createConnection(); // Using your existing connection function
         $this->startDate = $startDate;
         $this->endDate = $endDate;
         $this->currentUser = $currentUser;
+        $this->useSummary = $this->summaryAvailable();
+    }
+    
+    private function summaryAvailable() {
+        // Fall back to the live aggregates until the summary table has been built
+        try {
+            $stmt = $this->pdo->query("SELECT 1 FROM {$this->summaryTable} LIMIT 1");
+            return $stmt->fetchColumn() !== false;
+        } catch (PDOException $e) {
+            return false;
+        }
+    }
+    
+    private function runSummaryQuery($query, $fetchAll = true) {
+        // Summary rows are per day, so the range covers whole days
+        $stmt = $this->pdo->prepare($query);
+        $stmt->bindValue(':start_date', date('Y-m-d', strtotime($this->startDate)));
+        $stmt->bindValue(':end_date', date('Y-m-d', strtotime($this->endDate)));
+        $stmt->execute();
+        return $fetchAll ? $stmt->fetchAll(PDO::FETCH_ASSOC) : $stmt->fetch(PDO::FETCH_ASSOC);
     }
     
     public function getBasicStats() {
+        if ($this->useSummary) {
+            return $this->runSummaryQuery("
+                SELECT 
+                    (SELECT COALESCE(SUM(freelancer_count), 0) FROM {$this->summaryTable}) as total_freelancers,
+                    ROUND(SUM(rating_sum) / NULLIF(SUM(rated_count), 0), 2) as average_rating,
+                    ROUND(SUM(price_sum) / NULLIF(SUM(priced_count), 0), 2) as average_price,
+                    SUM(reviews_sum) as total_reviews,
+                    MIN(min_price) as min_price,
+                    MAX(max_price) as max_price
+                FROM {$this->summaryTable}
+                WHERE stat_date BETWEEN :start_date AND :end_date
+            ", false);
+        }
+        
         // Get total count of freelancers (no date filter)
         $queryTotal = "SELECT COUNT(*) as total_freelancers FROM {$this->tableName}";
         $stmtTotal = $this->pdo->prepare($queryTotal);
@@ -53,6 +90,38 @@ class FreelancerStats {
     }
     
     public function getCategoryStats() {
+        if ($this->useSummary) {
+            // Averages within the date range, or over all time for categories with no rows in it
+            $rows = $this->runSummaryQuery("
+                SELECT 
+                    category,
+                    SUM(freelancer_count) as freelancer_count,
+                    SUM(CASE WHEN stat_date BETWEEN :start_date AND :end_date THEN freelancer_count ELSE 0 END) as range_count,
+                    ROUND(SUM(CASE WHEN stat_date BETWEEN :start_date AND :end_date THEN price_sum END)
+                        / NULLIF(SUM(CASE WHEN stat_date BETWEEN :start_date AND :end_date THEN priced_count END), 0), 2) as range_price,
+                    ROUND(SUM(CASE WHEN stat_date BETWEEN :start_date AND :end_date THEN rating_sum END)
+                        / NULLIF(SUM(CASE WHEN stat_date BETWEEN :start_date AND :end_date THEN rated_count END), 0), 2) as range_rating,
+                    SUM(CASE WHEN stat_date BETWEEN :start_date AND :end_date THEN reviews_sum END) as range_reviews,
+                    ROUND(SUM(price_sum) / NULLIF(SUM(priced_count), 0), 2) as all_price,
+                    ROUND(SUM(rating_sum) / NULLIF(SUM(rated_count), 0), 2) as all_rating,
+                    SUM(reviews_sum) as all_reviews
+                FROM {$this->summaryTable}
+                GROUP BY category
+            ");
+            $result = [];
+            foreach ($rows as $row) {
+                $inRange = $row['range_count'] > 0;
+                $result[] = [
+                    'category' => $row['category'],
+                    'freelancer_count' => $row['freelancer_count'],
+                    'average_price' => ($inRange ? $row['range_price'] : $row['all_price']) ?? 0,
+                    'average_rating' => ($inRange ? $row['range_rating'] : $row['all_rating']) ?? 0,
+                    'total_reviews' => ($inRange ? $row['range_reviews'] : $row['all_reviews']) ?? 0
+                ];
+            }
+            return $this->sortCategories($result);
+        }
+        
         // First query to get counts of ALL freelancers by category (no date filter)
         $queryTotal = "
             SELECT 
@@ -139,6 +208,10 @@ class FreelancerStats {
             }
         }
         
+        return $this->sortCategories($result);
+    }
+    
+    private function sortCategories($result) {
         // Sort by category order
         usort($result, function($a, $b) {
             $order = [
@@ -158,6 +231,19 @@ class FreelancerStats {
     }
     
     public function getPriceRangeStats() {
+        if ($this->useSummary) {
+            return $this->runSummaryQuery("
+                SELECT 
+                    price_range,
+                    SUM(freelancer_count) as freelancer_count,
+                    ROUND(SUM(rating_sum) / NULLIF(SUM(rated_count), 0), 2) as average_rating
+                FROM {$this->summaryTable}
+                WHERE stat_date BETWEEN :start_date AND :end_date
+                GROUP BY price_range
+                ORDER BY FIELD(price_range, 'Below $20', '$20-$29', '$30-$39', '$40-$49', '$50 and above')
+            ");
+        }
+        
         $query = "
             SELECT 
                 CASE 
@@ -191,6 +277,20 @@ class FreelancerStats {
     }
     
     public function getMonthlyTrends() {
+        if ($this->useSummary) {
+            return $this->runSummaryQuery("
+                SELECT 
+                    DATE_FORMAT(stat_date, '%Y-%m') as month,
+                    SUM(freelancer_count) as new_freelancers,
+                    ROUND(SUM(price_sum) / NULLIF(SUM(priced_count), 0), 2) as average_price,
+                    ROUND(SUM(rating_sum) / NULLIF(SUM(rated_count), 0), 2) as average_rating
+                FROM {$this->summaryTable}
+                WHERE stat_date BETWEEN :start_date AND :end_date
+                GROUP BY DATE_FORMAT(stat_date, '%Y-%m')
+                ORDER BY month
+            ");
+        }
+        
         $query = "
             SELECT 
                 DATE_FORMAT(created_at, '%Y-%m') as month,
@@ -212,6 +312,19 @@ class FreelancerStats {
     }
     
     public function getRatingDistribution() {
+        if ($this->useSummary) {
+            return $this->runSummaryQuery("
+                SELECT 
+                    rating_range,
+                    SUM(freelancer_count) as freelancer_count,
+                    ROUND(SUM(price_sum) / NULLIF(SUM(priced_count), 0), 2) as average_price
+                FROM {$this->summaryTable}
+                WHERE stat_date BETWEEN :start_date AND :end_date
+                GROUP BY rating_range
+                ORDER BY FIELD(rating_range, 'Below 4.0', '4.0-4.4', '4.5-4.7', '4.8-4.9', '5.0')
+            ");
+        }
+        
         $query = "
             SELECT 
                 CASE 
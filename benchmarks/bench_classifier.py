@@ -0,0 +1,74 @@
+"""Descriptions/sec for determine_category: legacy substring loop vs the compiled classifier.
+
+The labelled corpus in fixtures/classifier_corpus.jsonl is checked first;
+the run aborts if the compiled classifier disagrees with any label.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from classifier import CATEGORY_KEYWORDS, DEFAULT_CATEGORY, CategoryClassifier
+
+CORPUS_PATH = os.path.join(ROOT, "fixtures", "classifier_corpus.jsonl")
+
+def legacy_determine_category(description):
+    """The original scrap.determine_category, kept here as the baseline"""
+    description = description.lower()
+    category_scores = {category: 0 for category in CATEGORY_KEYWORDS}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in description:
+                category_scores[category] += 1
+    max_score = max(category_scores.values())
+    if max_score > 0:
+        return max(category_scores.items(), key=lambda x: x[1])[0]
+    return DEFAULT_CATEGORY
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def synthetic_descriptions(corpus, count):
+    """`count` descriptions cycling through the corpus, each made unique so the memo never hits"""
+    texts = [entry["description"] for entry in corpus]
+    return [f"{texts[i % len(texts)]} #{i}" for i in range(count)]
+
+def rate(function, descriptions):
+    start = time.perf_counter()
+    function(descriptions)
+    return len(descriptions) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    classifier = CategoryClassifier()
+    corpus = load_corpus()
+    mismatches = [(entry["description"], classifier.classify(entry["description"]), entry["category"])
+                  for entry in corpus if classifier.classify(entry["description"]) != entry["category"]]
+    for description, got, expected in mismatches:
+        print(f"  {description!r}: got {got}, expected {expected}")
+    if mismatches:
+        sys.exit(f"❌ {len(mismatches)} of {len(corpus)} corpus entries misclassified")
+    legacy_disagreements = sum(legacy_determine_category(entry["description"]) != entry["category"]
+                               for entry in corpus)
+
+    descriptions = synthetic_descriptions(corpus, args.count)
+    results = {
+        "legacy": rate(lambda batch: [legacy_determine_category(d) for d in batch], descriptions),
+        "compiled": rate(classifier.classify_many, descriptions),
+    }
+    print(f"{len(corpus)} corpus entries pass ({legacy_disagreements} differ from the legacy substring loop)")
+    for name, value in results.items():
+        print(f"  {name:<8} {value:10.0f} descriptions/s  ({value / results['legacy']:.1f}x legacy)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "classifier", "count": args.count,
+                       "descriptions_per_sec": results}, f, indent=2)
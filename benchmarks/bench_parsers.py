@@ -0,0 +1,60 @@
+"""Cards/sec per parser backend over the saved Khamsat listing pages.
+
+Every backend must extract exactly the same fields as the original
+BeautifulSoup path; the run aborts if any card differs.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import khamasat
+from parsers import BACKENDS
+
+PAGES_GLOB = os.path.join(ROOT, "fixtures", "khamsat", "**", "*.html")
+# Fixed, so records from different passes compare equal
+CREATED_AT = "2025-01-01 00:00:00"
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(PAGES_GLOB, recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+def extract_all(pages, parser):
+    return [result for html in pages
+            for result in khamasat.parse_listing_page(html, parser=parser, created_at=CREATED_AT)]
+
+def bench(pages, name, repeat):
+    parser = khamasat.make_parser(name)
+    cards = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cards += len(extract_all(pages, parser))
+    return cards / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    pages = load_pages()
+    expected = extract_all(pages, khamasat.make_parser("bs4"))
+    for name in BACKENDS:
+        if extract_all(pages, khamasat.make_parser(name)) != expected:
+            sys.exit(f"❌ Backend {name} does not match the bs4 output")
+
+    results = {name: bench(pages, name, args.repeat) for name in BACKENDS}
+    print(f"{len(pages)} pages, {len(expected)} cards, all backends produce identical fields")
+    for name, rate in results.items():
+        print(f"  {name:<6} {rate:10.0f} cards/s  ({rate / results['bs4']:.1f}x bs4)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "parsers", "cards_per_sec": results}, f, indent=2)
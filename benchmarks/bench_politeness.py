@@ -0,0 +1,119 @@
+"""Wall time per 100 records: legacy fixed sleeps vs. the politeness scheduler.
+
+Khamsat is measured for real against the local fixture server. The
+PeoplePerHour browser flow is simulated with a fake navigation latency,
+since the legacy cost there is dominated by the fixed sleeps anyway.
+All sleeps, latencies and rates are multiplied by --time-scale to keep the
+run short; the time spent sleeping is scaled back to real seconds in the
+report, the time spent fetching and parsing is reported as measured.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import khamasat
+import scrap
+from browser_pool import DEFAULT_NAV_RATE
+from crawler import DEFAULT_HOST_RATE
+from fixture_server import start_fixture_server
+from politeness import PolitenessScheduler
+
+RECORDS = 100
+PPH_CARDS_PER_PAGE = 15
+
+def fixture_urls(base_url):
+    pages = itertools.cycle([1, 2, 3])
+    for slug in itertools.cycle(khamasat.PROGRAMMING_CATEGORIES):
+        page = next(pages)
+        yield f"{base_url}/programming/{slug}" + (f"?page={page}" if page > 1 else "")
+
+def khamsat_legacy(base_url, scale):
+    done = 0
+    slept = 0.0
+    for url in fixture_urls(base_url):
+        html = requests.get(url, timeout=15).text
+        for _ in khamasat.parse_listing_page(html):
+            delay = random.uniform(0.1, 0.3) * scale
+            time.sleep(delay)
+            slept += delay
+            done += 1
+            if done == RECORDS:
+                return slept
+
+def khamsat_scheduled(base_url, scale):
+    scheduler = PolitenessScheduler(rate=DEFAULT_HOST_RATE / scale)
+    done = 0
+    for url in fixture_urls(base_url):
+        scheduler.wait(url)
+        html = requests.get(url, timeout=15).text
+        done += len(khamasat.parse_listing_page(html))
+        if done >= RECORDS:
+            return scheduler.waited
+
+def pph_legacy(latency, scale):
+    done = 0
+    while done < RECORDS:
+        time.sleep((latency + 5) * scale)  # driver.get + fixed wait
+        for _ in range(PPH_CARDS_PER_PAGE):
+            time.sleep((latency + 3) * scale)  # profile tab + fixed wait
+            done += 1
+            if done == RECORDS:
+                return
+        time.sleep(random.uniform(2, 4) * scale)
+
+def pph_scheduled(latency, scale):
+    scheduler = PolitenessScheduler(rate=DEFAULT_NAV_RATE / scale, burst=scrap.NAVIGATION_BURST,
+                                    jitter=scrap.NAVIGATION_JITTER)
+    url = "https://www.peopleperhour.com/services"
+    done = 0
+    while done < RECORDS:
+        scheduler.wait(url)
+        time.sleep(latency * scale)
+        for _ in range(PPH_CARDS_PER_PAGE):
+            scheduler.wait(url)
+            time.sleep(latency * scale)
+            done += 1
+            if done == RECORDS:
+                return
+
+def timed(fn, *args, scale=1.0):
+    """Elapsed seconds with the scaled sleep time (returned by fn) scaled back up"""
+    start = time.perf_counter()
+    slept = fn(*args)
+    elapsed = time.perf_counter() - start
+    if slept is None:
+        return elapsed / scale
+    return elapsed + slept * (1 / scale - 1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--time-scale", type=float, default=0.05)
+    parser.add_argument("--nav-latency", type=float, default=1.0,
+                        help="Simulated seconds per browser navigation")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server()
+    scale = args.time_scale
+    results = {
+        "khamsat_legacy": timed(khamsat_legacy, base_url, scale, scale=scale),
+        "khamsat_scheduled": timed(khamsat_scheduled, base_url, scale, scale=scale),
+        "pph_legacy": timed(pph_legacy, args.nav_latency, scale, scale=scale),
+        "pph_scheduled": timed(pph_scheduled, args.nav_latency, scale, scale=scale),
+    }
+    server.shutdown()
+
+    print(f"Wall time per {RECORDS} records (seconds)")
+    for name, seconds in results.items():
+        print(f"  {name:<20} {seconds:8.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "politeness", "records": RECORDS, "seconds": results}, f, indent=2)
@@ -0,0 +1,284 @@
+"""Benchmark suite over the saved Khamsat and PeoplePerHour fixtures.
+
+    python benchmarks/run_benchmarks.py                        # every suite, report under reports/
+    python benchmarks/run_benchmarks.py --suite extract --suite page
+    python benchmarks/run_benchmarks.py --sizes 1000,10000 --compare reports/benchmarks-old.json
+
+Suites:
+
+- extract:  single-card extract_service_data throughput per parser backend
+- page:     whole listing page parse time (Khamsat per backend, PeoplePerHour
+            listing cards + profile headline + build_row)
+- classify: determine_category throughput over synthetic descriptions
+- import:   synthetic records through BatchedWriter and refresh_stats into a
+            scratch SQLite database, once as inserts and once as upserts
+
+The page suite also checks the fixtures still parse: every card must come
+out, and the per-selector hit/fallback/miss counters are stored with the
+results, so a markup change shows up as a counter diff under --compare.
+Results are one JSON document per run ({"benchmarks": {name: {value, unit,
+higher_is_better, ...}}}) written with the same environment header each
+time, so runs can be compared over time.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import khamasat
+import scrap
+from bench_classifier import load_corpus, synthetic_descriptions
+from db import SQLITE, DbConfig, connect
+from db_writer import DEFAULT_BATCH_ROWS, BatchedWriter
+from materialize_stats import check_stats, refresh_stats
+from metrics import Metrics, default_report_path
+from parsers import BACKENDS, make_backend
+from profile_enricher import ProfileEnricher
+from schema import ensure_upsert_schema, natural_key
+
+KHAMSAT_PAGES = os.path.join(ROOT, "fixtures", "khamsat", "**", "*.html")
+PPH_LISTINGS = os.path.join(ROOT, "fixtures", "peopleperhour", "services", "**", "*.html")
+PPH_PROFILES = os.path.join(ROOT, "fixtures", "peopleperhour", "freelancer", "**", "*.html")
+
+SUITES = ("extract", "page", "classify", "import")
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_CLASSIFY_COUNT = 100000
+STATS_DAYS = 90
+
+def read_pages(pattern):
+    pages = {}
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.relpath(path, ROOT)] = f.read()
+    return pages
+
+def timed(function, repeat):
+    """Best wall time of `repeat` calls, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def result(value, unit, higher_is_better=True, **details):
+    return {"value": round(value, 3), "unit": unit, "higher_is_better": higher_is_better, **details}
+
+def bench_extract(repeat):
+    """Cards/s through extract_service_data alone, the listing pages already parsed"""
+    pages = read_pages(KHAMSAT_PAGES)
+    results = {}
+    for name in BACKENDS:
+        parser = khamasat.make_parser(name)
+        cards = []
+        for html in pages.values():
+            soup = parser.parse(html)
+            for selector in khamasat.SERVICE_SELECTORS:
+                found = soup.select(selector)
+                if found:
+                    cards.extend(found)
+                    break
+        seconds = timed(lambda: [khamasat.extract_service_data(card) for card in cards], repeat)
+        results[f"extract.khamsat.{name}"] = result(len(cards) / seconds, "cards/s", cards=len(cards))
+    return results
+
+def pph_cards(root):
+    """The fields extract_listing_cards reads with Selenium, read from a parsed listing page"""
+    cards = []
+    for link in root.select(scrap.CARD_LINK_SELECTOR)[:scrap.CARDS_PER_PAGE]:
+        cards.append({
+            'username': link.select_one(scrap.CARD_USERNAME_SELECTOR).text.strip(),
+            'profile_link': link.get("href"),
+            'profile_image': link.select_one("img").get("src"),
+            'rating': link.select_one(scrap.CARD_RATING_SELECTOR).text.split()[0],
+            'reviews': link.select_one(scrap.CARD_REVIEWS_SELECTOR).text.strip().replace("(", "").replace(")", ""),
+        })
+    return cards
+
+def bench_page(repeat):
+    """Milliseconds per listing page, plus the selector counters of one pass"""
+    results = {}
+    pages = read_pages(KHAMSAT_PAGES)
+    for name in BACKENDS:
+        parser = khamasat.make_parser(name)
+        metrics = Metrics()
+        extracted = [row for html in pages.values() for row in khamasat.parse_listing_page(html, parser=parser,
+                                                                                          metrics=metrics)]
+        failed = sum(1 for record in extracted if record is None)
+        if failed or not extracted:
+            raise RuntimeError(f"{failed} of {len(extracted)} Khamsat fixture cards failed with {name}")
+        seconds = timed(lambda: [khamasat.parse_listing_page(html, parser=parser) for html in pages.values()], repeat)
+        selectors = {counter: n for counter, n in sorted(metrics.counters.items()) if counter.startswith("selector.")}
+        results[f"page.khamsat.{name}"] = result(seconds / len(pages) * 1000, "ms/page", False,
+                                                 pages=len(pages), cards=len(extracted), selectors=selectors)
+
+    listings = read_pages(PPH_LISTINGS)
+    profiles = {os.path.splitext(os.path.basename(path))[0]: html
+                for path, html in read_pages(PPH_PROFILES).items()}
+    parser = make_backend("lxml", [scrap.CARD_LINK_SELECTOR, scrap.CARD_USERNAME_SELECTOR,
+                                   scrap.CARD_RATING_SELECTOR, scrap.CARD_REVIEWS_SELECTOR])
+    enricher = ProfileEnricher(cache_path=None)
+
+    def parse_pph():
+        rows = []
+        for html in listings.values():
+            for card in pph_cards(parser.parse(html)):
+                profile = profiles.get(card['profile_link'].rstrip("/").rsplit("/", 1)[-1])
+                description = (enricher.parse_description(profile) if profile else "") or scrap.DEFAULT_DESCRIPTION
+                rows.append(scrap.build_row(card, description))
+        return rows
+
+    rows = parse_pph()
+    if not rows:
+        raise RuntimeError("No PeoplePerHour fixture cards could be read")
+    missing = sum(1 for row in rows if row[5] == scrap.DEFAULT_DESCRIPTION)
+    seconds = timed(parse_pph, repeat)
+    results["page.peopleperhour.lxml"] = result(seconds / len(listings) * 1000, "ms/page", False,
+                                                pages=len(listings), cards=len(rows),
+                                                profiles_without_headline=missing)
+    return results
+
+def bench_classify(count):
+    descriptions = synthetic_descriptions(load_corpus(), count)
+    seconds = timed(lambda: [scrap.determine_category(d) for d in descriptions], 1)
+    return {"classify.determine_category": result(count / seconds, "descriptions/s", count=count)}
+
+def synthetic_rows(count):
+    """`count` distinct freelancers rows built from the fixture cards, spread over STATS_DAYS days"""
+    templates = [record for html in read_pages(KHAMSAT_PAGES).values()
+                 for record in khamasat.parse_listing_page(html) if record]
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        record = templates[i % len(templates)]
+        profile_link = f"{record.profile_link}-{i}"
+        created_at = (start + timedelta(days=i % STATS_DAYS, seconds=i % 86400)).strftime("%Y-%m-%d %H:%M:%S")
+        rows.append((f"{record.username}-{i}", profile_link, record.profile_image, record.rating,
+                     record.reviews + i % 7, record.short_description, record.price + i % 20,
+                     record.category, created_at, natural_key(profile_link), record.slug or None))
+    return rows
+
+def import_rows(connection, rows, batch_rows):
+    start = time.perf_counter()
+    with BatchedWriter(connection, batch_rows=batch_rows) as writer:
+        for row in rows:
+            writer.add(row)
+    write_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    days = refresh_stats(connection, writer.written_keys)
+    return write_seconds, time.perf_counter() - start, days
+
+def bench_import(sizes, batch_rows):
+    """Rows/s into a fresh SQLite file per size; the stats refresh is timed separately"""
+    results = {}
+    for size in sizes:
+        rows = synthetic_rows(size)
+        with tempfile.TemporaryDirectory() as directory:
+            connection = connect(DbConfig(backend=SQLITE, sqlite_path=os.path.join(directory, "bench.sqlite3")))
+            try:
+                ensure_upsert_schema(connection)
+                for phase in ("insert", "upsert"):
+                    write_seconds, stats_seconds, days = import_rows(connection, rows, batch_rows)
+                    results[f"import.sqlite.{phase}.{size}"] = result(
+                        size / (write_seconds + stats_seconds), "rows/s", rows=size, batch_rows=batch_rows,
+                        write_seconds=round(write_seconds, 3), stats_seconds=round(stats_seconds, 3),
+                        stats_days=days)
+                if size == min(sizes) and check_stats(connection):
+                    raise RuntimeError("freelancer_stats_daily does not match the imported rows")
+            finally:
+                connection.close()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, previous):
+    """Print the change of every benchmark present in both runs; returns the names that got worse"""
+    worse = []
+    print(f"\nCompared with {previous.get('commit') or 'unknown commit'} ({previous.get('started_at')}):")
+    for name, now in current["benchmarks"].items():
+        before = previous.get("benchmarks", {}).get(name)
+        if not before or not before["value"]:
+            continue
+        change = (now["value"] - before["value"]) / before["value"] * 100
+        better = change >= 0 if now["higher_is_better"] else change <= 0
+        print(f"  {name:<36} {before['value']:>12.1f} -> {now['value']:>12.1f} {now['unit']:<15} "
+              f"{change:+6.1f}%")
+        if not better:
+            worse.append((name, change))
+        if now.get("selectors") != before.get("selectors") and "selectors" in before:
+            print(f"    ⚠️ selector counters changed: {before['selectors']} -> {now['selectors']}")
+    return worse
+
+def run(suites, repeat=5, sizes=DEFAULT_SIZES, classify_count=DEFAULT_CLASSIFY_COUNT, batch_rows=DEFAULT_BATCH_ROWS):
+    report = {
+        "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "suites": list(suites),
+        "benchmarks": {},
+    }
+    for suite in suites:
+        print(f"▶ {suite}")
+        start = time.perf_counter()
+        if suite == "extract":
+            results = bench_extract(repeat)
+        elif suite == "page":
+            results = bench_page(repeat)
+        elif suite == "classify":
+            results = bench_classify(classify_count)
+        else:
+            results = bench_import(sizes, batch_rows)
+        for name, data in results.items():
+            print(f"  {name:<36} {data['value']:>12.1f} {data['unit']}")
+        report["benchmarks"].update(results)
+        print(f"  ({time.perf_counter() - start:.1f}s)")
+    return report
+
+def parse_sizes(value):
+    return tuple(int(size) for size in value.split(","))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite over the saved scraper fixtures")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="Suite to run (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per parse benchmark; the best one counts")
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES,
+                        help="Comma separated record counts for the import suite (default: 1000,10000,100000)")
+    parser.add_argument("--count", type=int, default=DEFAULT_CLASSIFY_COUNT, help="Descriptions to classify")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--json", default=default_report_path("benchmarks"), help="Where to write the results")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--fail-over", type=float,
+                        help="With --compare, exit non-zero when a benchmark got worse by more than this percentage")
+    args = parser.parse_args()
+
+    report = run(args.suite or SUITES, args.repeat, args.sizes, args.count, args.batch_rows)
+    directory = os.path.dirname(args.json)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            worse = compare(report, json.load(f))
+        regressions = [(name, change) for name, change in worse
+                       if args.fail_over is not None and abs(change) > args.fail_over]
+        if regressions:
+            sys.exit(f"❌ {len(regressions)} benchmarks regressed by more than {args.fail_over}%")
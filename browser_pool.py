@@ -0,0 +1,185 @@
+"""Pool of Selenium browser workers fed from a shared, typed work queue.
+
+Each worker thread owns one WebDriver. Tasks are (kind, payload) pairs
+dispatched to the handler registered for their kind; handlers may submit
+follow-up tasks, e.g. a listing page fans out into profile tasks.
+"""
+import itertools
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+BROWSERS = ("edge", "chrome", "chromium", "firefox")
+DEFAULT_WORKERS = 4
+# Navigations per second per host, shared by all workers. A worker spends a
+# few seconds per page load, so the pool only scales with --workers while
+# this stays above workers / seconds per page; raise it with the worker count.
+DEFAULT_NAV_RATE = 0.5
+
+@dataclass
+class BrowserConfig:
+    """Which browser to drive and how; defaults come from the environment"""
+    browser: str = field(default_factory=lambda: os.environ.get(
+        "SCRAPER_BROWSER", "edge" if sys.platform == "win32" else "chromium"))
+    driver_path: str = field(default_factory=lambda: os.environ.get("SCRAPER_DRIVER_PATH") or None)
+    binary: str = field(default_factory=lambda: os.environ.get("SCRAPER_BROWSER_BINARY") or None)
+    headless: bool = field(default_factory=lambda: os.environ.get("SCRAPER_HEADLESS", "1") != "0")
+    nav_rate: float = field(default_factory=lambda: float(os.environ.get("SCRAPER_NAV_RATE", DEFAULT_NAV_RATE)))
+
+def _chromium_options(options, config):
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--disable-notifications')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    if config.headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+    return options
+
+def make_driver(config=None):
+    """Create a WebDriver for `config`; without a driver_path Selenium Manager locates the driver"""
+    config = config or BrowserConfig()
+    if config.browser == "edge":
+        from selenium.webdriver.edge.service import Service
+        options = _chromium_options(webdriver.EdgeOptions(), config)
+        driver = webdriver.Edge(service=Service(config.driver_path), options=options)
+    elif config.browser in ("chrome", "chromium"):
+        from selenium.webdriver.chrome.service import Service
+        options = _chromium_options(webdriver.ChromeOptions(), config)
+        binary = config.binary
+        if not binary and config.browser == "chromium":
+            binary = shutil.which("chromium") or shutil.which("chromium-browser")
+        if binary:
+            options.binary_location = binary
+        driver = webdriver.Chrome(service=Service(config.driver_path), options=options)
+    elif config.browser == "firefox":
+        from selenium.webdriver.firefox.service import Service
+        options = webdriver.FirefoxOptions()
+        options.set_preference("dom.webdriver.enabled", False)
+        if config.headless:
+            options.add_argument("-headless")
+        if config.binary:
+            options.binary_location = config.binary
+        driver = webdriver.Firefox(service=Service(config.driver_path), options=options)
+    else:
+        raise ValueError(f"Unknown browser {config.browser!r}, expected one of {BROWSERS}")
+
+    if config.browser != "firefox":
+        # Add undetectable properties
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+class BrowserPool:
+    """Runs typed tasks on `workers` browser threads until the queue drains.
+
+    `handlers` maps a task kind to `handler(driver, payload, pool)`. Lower
+    `priorities` run first, so listing pages can be scheduled ahead of the
+    profile fetches they produce. After run(), `started` is the number of
+    workers that got a browser and `unrun` the tasks no worker picked up;
+    `completed` is False if either means the run did not happen.
+    """
+
+    def __init__(self, handlers, workers=DEFAULT_WORKERS, config=None, priorities=None,
+                 driver_factory=make_driver):
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.config = config or BrowserConfig()
+        self.priorities = priorities or {}
+        self.driver_factory = driver_factory
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.done = {kind: 0 for kind in handlers}
+        self.failed = {kind: 0 for kind in handlers}
+        self.busy_seconds = {kind: 0.0 for kind in handlers}
+        self.started = 0
+        self.unrun = 0
+        self.elapsed = 0.0
+
+    def submit(self, kind, payload):
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for task kind {kind!r}")
+        with self._lock:
+            self._pending += 1
+        self._queue.put((self.priorities.get(kind, 0), next(self._sequence), kind, payload))
+
+    def _next_task(self):
+        """Block until a task is available; None once nothing is queued or running"""
+        while True:
+            try:
+                return self._queue.get(timeout=0.2)
+            except queue.Empty:
+                with self._lock:
+                    if self._pending == 0:
+                        return None
+
+    def _work(self, number):
+        try:
+            driver = self.driver_factory(self.config)
+        except Exception as e:
+            message = e.msg if isinstance(e, WebDriverException) else e
+            print(f"❌ Browser worker {number} could not start {self.config.browser}: {message}")
+            return
+        with self._lock:
+            self.started += 1
+        try:
+            while True:
+                task = self._next_task()
+                if task is None:
+                    break
+                _, _, kind, payload = task
+                start = time.monotonic()
+                try:
+                    self.handlers[kind](driver, payload, self)
+                    ok = True
+                except Exception as e:
+                    ok = False
+                    print(f"⚠️ Worker {number} failed {kind} task: {str(e).splitlines()[0] if str(e) else e!r}")
+                with self._lock:
+                    self.busy_seconds[kind] += time.monotonic() - start
+                    if ok:
+                        self.done[kind] += 1
+                    else:
+                        self.failed[kind] += 1
+                    self._pending -= 1
+        finally:
+            driver.quit()
+
+    def run(self):
+        """Start the workers and wait until every submitted task has been handled"""
+        start = time.monotonic()
+        threads = [threading.Thread(target=self._work, args=(n + 1,), daemon=True)
+                   for n in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.monotonic() - start
+        self.unrun = self._queue.qsize()
+        if self.unrun:
+            print(f"⚠️ {self.unrun} tasks were never run (no browser worker available)")
+        return self
+
+    @property
+    def tasks_run(self):
+        return sum(self.done.values()) + sum(self.failed.values())
+
+    @property
+    def completed(self):
+        """Whether at least one browser started and every submitted task was run"""
+        return self.started > 0 and self.unrun == 0
+
+    def summary(self):
+        parts = [f"{kind}: {self.done[kind]} done, {self.failed[kind]} failed, "
+                 f"{self.busy_seconds[kind]:.1f}s busy" for kind in self.handlers]
+        return (f"{self.started}/{self.workers} workers started, {self.tasks_run} tasks run, "
+                f"{self.unrun} never run in {self.elapsed:.1f}s ({'; '.join(parts)})")
@@ -0,0 +1,84 @@
+"""Keyword category classifier for freelancer descriptions.
+
+Descriptions are split into words with one compiled regex and every run of
+1..N words is looked up in a dict built from the keyword lists, so a
+keyword only matches whole words ("ai" no longer matches "maintain") and
+each description is scanned once regardless of how many keywords exist.
+Like the original substring loop, a category scores one point per distinct
+keyword present; ties go to the category listed first.
+"""
+import re
+
+CATEGORY_KEYWORDS = {
+    'web-development': ['web', 'developer', 'development', 'javascript', 'react', 'vue', 'angular', 'node', 'php', 'laravel', 'html', 'css', 'bootstrap', 'tailwind', 'wordpress', 'shopify', 'frontend', 'backend', 'full stack'],
+    'mobile-development': ['mobile', 'android', 'ios', 'flutter', 'react native', 'kotlin', 'swift', 'dart', 'xamarin', 'ionic', 'app development', 'pwa', 'mobile app'],
+    'data-science-ml': ['data', 'machine learning', 'artificial intelligence', 'ai', 'ml', 'python', 'pandas', 'tensorflow', 'pytorch', 'scikit', 'data analysis', 'data scientist', 'big data', 'nlp', 'deep learning', 'neural network'],
+    'cybersecurity': ['security', 'cyber', 'ethical hacking', 'penetration testing', 'pen test', 'infosec', 'firewall', 'cryptography', 'encryption', 'vulnerability', 'security audit', 'siem', 'compliance', 'gdpr'],
+    'cloud-devops': ['cloud', 'aws', 'azure', 'gcp', 'google cloud', 'devops', 'docker', 'kubernetes', 'jenkins', 'ci/cd', 'terraform', 'ansible', 'infrastructure', 'iaas', 'paas', 'saas', 'microservices', 'serverless']
+}
+
+DEFAULT_CATEGORY = 'web-development'
+
+_WORD = re.compile(r"[^\W_]+")
+
+def _words(text):
+    return _WORD.findall(text.lower())
+
+class CategoryClassifier:
+    """Compiled form of a {category: [keywords]} mapping"""
+
+    def __init__(self, categories=CATEGORY_KEYWORDS, default=DEFAULT_CATEGORY):
+        self.categories = list(categories)
+        self.default = default
+        # "ci/cd" and "ci cd" both become the phrase "ci cd"
+        self._phrases = {}
+        for index, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                phrase = " ".join(_words(keyword))
+                if phrase:
+                    self._phrases.setdefault(phrase, set()).add(index)
+        self._max_words = max((phrase.count(" ") + 1 for phrase in self._phrases), default=1)
+        # Only words that open a multi-word keyword need the n-gram walk
+        self._openers = {phrase.split(" ", 1)[0] for phrase in self._phrases if " " in phrase}
+
+    def matched_keywords(self, description):
+        """Distinct keyword phrases found in `description` as whole words"""
+        words = _words(description or "")
+        phrases = self._phrases
+        found = {word for word in words if word in phrases}
+        openers = self._openers
+        for start, phrase in enumerate(words):
+            if phrase not in openers:
+                continue
+            for end in range(start + 1, min(start + self._max_words, len(words))):
+                phrase = phrase + " " + words[end]
+                if phrase in phrases:
+                    found.add(phrase)
+        return found
+
+    def scores(self, description):
+        """Number of distinct keywords matched per category, in category order"""
+        scores = [0] * len(self.categories)
+        for phrase in self.matched_keywords(description):
+            for index in self._phrases[phrase]:
+                scores[index] += 1
+        return scores
+
+    def classify(self, description):
+        scores = self.scores(description)
+        best = max(scores, default=0)
+        if best == 0:
+            return self.default
+        return self.categories[scores.index(best)]
+
+    def classify_many(self, descriptions):
+        """Classify a batch; repeated descriptions are only scanned once"""
+        memo = {}
+        classify = self.classify
+        results = []
+        for description in descriptions:
+            category = memo.get(description)
+            if category is None:
+                category = memo[description] = classify(description)
+            results.append(category)
+        return results
@@ -0,0 +1,57 @@
+"""One-shot compaction: removes duplicate freelancers and installs the unique natural key.
+
+Run once before the first upsert import (and any time later, it is
+idempotent):
+
+    python compact_freelancers.py --dry-run
+    python compact_freelancers.py
+"""
+import argparse
+
+from db import DB_ERRORS, create_db_connection
+from materialize_stats import rebuild_stats
+from schema import (add_key_column, add_unique_index, backfill_keys, count_duplicates,
+                    delete_duplicates, rekey_seller_rows)
+
+def compact(dry_run=False):
+    connection = create_db_connection()
+    if not connection:
+        return False
+    try:
+        if add_key_column(connection):
+            print("✅ Added freelancers.source_key")
+        backfilled = backfill_keys(connection)
+        print(f"Backfilled natural keys for {backfilled} rows")
+        rekeyed = rekey_seller_rows(connection)
+        if rekeyed:
+            print(f"Re-keyed {rekeyed} Khamsat rows from their seller to the service")
+
+        duplicates = count_duplicates(connection)
+        print(f"Found {duplicates} duplicate rows")
+        if dry_run:
+            print("Dry run: nothing deleted")
+            return True
+
+        if duplicates:
+            deleted = delete_duplicates(connection)
+            print(f"🧹 Deleted {deleted} duplicate rows (kept the newest row per key)")
+            # The deleted rows are gone, so their days cannot be looked up anymore
+            rows = rebuild_stats(connection)
+            print(f"✅ Rebuilt the statistics ({rows} summary rows)")
+        if add_unique_index(connection):
+            print("✅ Added unique index on freelancers.source_key")
+        return True
+    except DB_ERRORS as e:
+        connection.rollback()
+        print(f"Database error: {e}")
+        return False
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate freelancers and add the unique natural key")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be deleted")
+    args = parser.parse_args()
+
+    success = compact(dry_run=args.dry_run)
+    print("\n✅ Compaction completed" if success else "\n❌ Compaction failed")
@@ -0,0 +1,160 @@
+import asyncio
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+
+import requests
+
+from politeness import PolitenessScheduler
+
+# Crawl defaults
+BASE_URL = "https://khamsat.com"
+SECTION = "programming"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_HOST_RATE = 4.0  # Requests per second allowed against a single host
+REQUEST_TIMEOUT = 15
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9,ar;q=0.8"
+}
+
+@dataclass
+class CrawlTarget:
+    """A single listing page to fetch"""
+    category: str
+    page: int
+    url: str
+
+@dataclass
+class CrawlStats:
+    """Counters collected over one crawl"""
+    pages_ok: int = 0
+    pages_failed: int = 0
+    pages_not_modified: int = 0
+    bytes_received: int = 0
+    fetch_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float = 0.0
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def merge(self, other):
+        """Fold the counters of a later crawl into this one"""
+        self.pages_ok += other.pages_ok
+        self.pages_failed += other.pages_failed
+        self.pages_not_modified += other.pages_not_modified
+        self.bytes_received += other.bytes_received
+        self.fetch_seconds += other.fetch_seconds
+        self.finished_at = other.finished_at
+
+def build_targets(categories, pages, base_url=BASE_URL, section=SECTION):
+    """Expand category slugs and page numbers into crawl targets"""
+    targets = []
+    for slug in categories:
+        for page in pages:
+            url = f"{base_url.rstrip('/')}/{section}/{slug}"
+            if page > 1:
+                url += f"?page={page}"
+            targets.append(CrawlTarget(slug, page, url))
+    return targets
+
+_local = threading.local()
+
+def _session():
+    """One keep-alive session per executor thread (requests.Session is not thread-safe)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        _local.session = session
+    return session
+
+def fetch_page(url, timeout=REQUEST_TIMEOUT, cache=None):
+    """Blocking fetch of one page, run inside the executor.
+
+    With a cache, the request carries the stored validators; the result is
+    None when the server answers 304 Not Modified.
+    """
+    headers = cache.conditional_headers(url) if cache else {}
+    r = _session().get(url, timeout=timeout, headers=headers)
+    if r.status_code == 304 and cache:
+        cache.touch(url)
+        return None
+    r.raise_for_status()
+    if cache:
+        cache.store(url, r.text, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+    return r.text
+
+async def crawl(targets, handle_page, concurrency=DEFAULT_CONCURRENCY, host_rate=DEFAULT_HOST_RATE,
+                scheduler=None, cache=None, offline=False, on_not_modified=None, metrics=None):
+    """Fetch all targets concurrently and hand each page to `handle_page(target, html)`.
+
+    Pages are handed over on the event loop thread as they complete, so the
+    handler can safely use a single database connection. The handler may be
+    a coroutine function; it is awaited while the fetch slot is still held,
+    so a slow consumer throttles fetching. Request starts are spaced by
+    `scheduler`, or by a per-host token bucket at `host_rate`.
+
+    With a `cache` (http_cache.ResponseCache), pages answered with 304 Not
+    Modified are counted and skipped without calling the handler. With
+    `offline=True` no request is made at all: every page is replayed from
+    the cache and handled as if it had just been fetched.
+    `on_not_modified(target)`, if given, is called for every 304.
+    With `metrics` (metrics.Metrics) fetch times, a page latency histogram
+    and outcome counters are recorded.
+    """
+    if offline and cache is None:
+        raise ValueError("offline crawling needs a response cache")
+    stats = CrawlStats()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    scheduler = scheduler or PolitenessScheduler(rate=host_rate)
+    loop = asyncio.get_running_loop()
+
+    async def run(target):
+        async with semaphore:
+            start = time.monotonic()
+            if offline:
+                html = await loop.run_in_executor(None, cache.get, target.url)
+                if html is None:
+                    stats.pages_failed += 1
+                    if metrics:
+                        metrics.count("fetch.cache_miss")
+                    print(f"⚠️ Not in cache: {target.url}")
+                    return
+            else:
+                await scheduler.acquire(target.url)
+                start = time.monotonic()
+                try:
+                    html = await loop.run_in_executor(None, fetch_page, target.url, REQUEST_TIMEOUT, cache)
+                except requests.exceptions.RequestException as e:
+                    stats.pages_failed += 1
+                    if metrics:
+                        metrics.count("fetch.failed")
+                    print(f"⚠️ Failed to fetch {target.url}: {e}")
+                    return
+                if html is None:
+                    stats.pages_not_modified += 1
+                    if metrics:
+                        metrics.count("fetch.not_modified")
+                    if on_not_modified:
+                        on_not_modified(target)
+                    return
+            elapsed = time.monotonic() - start
+            stats.fetch_seconds += elapsed
+            if metrics:
+                metrics.add_time("fetch", elapsed)
+                metrics.observe("fetch.latency", elapsed)
+                metrics.count("fetch.ok")
+            stats.pages_ok += 1
+            stats.bytes_received += len(html)
+            result = handle_page(target, html)
+            if inspect.isawaitable(result):
+                await result
+
+    await asyncio.gather(*(run(target) for target in targets))
+    stats.finished_at = time.monotonic()
+    return stats
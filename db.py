@@ -0,0 +1,232 @@
+"""Shared database access for the importers and maintenance scripts.
+
+Connection settings come from the environment (same names as the
+constants in api/config.php):
+
+    DB_BACKEND      mysql (default) or sqlite
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+    DB_POOL_SIZE    MySQL connections kept in the pool (default 5)
+    DB_LOCAL_INFILE 1 to allow LOAD DATA LOCAL INFILE (load_records.py --method infile)
+    DB_SQLITE_PATH  database file for the sqlite backend
+
+MySQL connections come from a mysql.connector.pooling pool, so closing
+one hands it back to the pool. The sqlite backend wraps sqlite3 behind the
+same interface (%s placeholders, cursor(buffered=...)) and creates the
+freelancers and metadata tables, so the whole pipeline can run locally
+without a MySQL server. Code that needs backend specific SQL asks
+dialect(connection).
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+import mysql.connector
+import mysql.connector.pooling
+
+MYSQL = "mysql"
+SQLITE = "sqlite"
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_SQLITE_PATH = "freelancima.sqlite3"
+DEFAULT_RETRIES = 3
+
+# Deadlock, lock wait timeout, server gone away, lost connection, connection unavailable
+RETRYABLE_MYSQL_ERRORS = {1205, 1213, 2006, 2013, 2055}
+LOST_CONNECTION_ERRORS = {2006, 2013, 2055}
+
+DB_ERRORS = (mysql.connector.Error, sqlite3.Error)
+
+@dataclass
+class DbConfig:
+    """Connection settings; defaults come from the environment"""
+    backend: str = field(default_factory=lambda: os.environ.get("DB_BACKEND", MYSQL))
+    host: str = field(default_factory=lambda: os.environ.get("DB_HOST", "localhost"))
+    port: int = field(default_factory=lambda: int(os.environ.get("DB_PORT", "3306")))
+    database: str = field(default_factory=lambda: os.environ.get("DB_NAME", "freelancima"))
+    user: str = field(default_factory=lambda: os.environ.get("DB_USER", "root"))
+    password: str = field(default_factory=lambda: os.environ.get("DB_PASSWORD", ""))
+    pool_size: int = field(default_factory=lambda: int(os.environ.get("DB_POOL_SIZE", DEFAULT_POOL_SIZE)))
+    local_infile: bool = field(default_factory=lambda: os.environ.get("DB_LOCAL_INFILE", "0") == "1")
+    sqlite_path: str = field(default_factory=lambda: os.environ.get("DB_SQLITE_PATH", DEFAULT_SQLITE_PATH))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _mysql_pool(config):
+    key = (config.host, config.port, config.database, config.user, config.pool_size, config.local_infile)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = mysql.connector.pooling.MySQLConnectionPool(
+                pool_name=f"freelancima_{len(_pools)}",
+                pool_size=config.pool_size,
+                host=config.host,
+                port=config.port,
+                database=config.database,
+                user=config.user,
+                password=config.password,
+                autocommit=False,
+                allow_local_infile=config.local_infile,
+            )
+    return pool
+
+_PLACEHOLDER = re.compile(r"%s")
+
+class SqliteCursor:
+    """sqlite3 cursor accepting the %s placeholders used throughout the importers"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_PLACEHOLDER.sub("?", sql), tuple(params))
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(_PLACEHOLDER.sub("?", sql), rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+class SqliteConnection:
+    """The subset of the mysql.connector connection API the importers use"""
+    dialect = SQLITE
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+    def cursor(self, buffered=None, **kwargs):
+        return SqliteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS freelancers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(255),
+    profile_link VARCHAR(512),
+    profile_image VARCHAR(512),
+    rating DECIMAL(3, 2),
+    reviews INT,
+    short_description TEXT,
+    price DECIMAL(10, 2),
+    category VARCHAR(255),
+    created_at DATETIME
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    last_updated DATETIME,
+    updated_by VARCHAR(255),
+    record_count INT
+);
+"""
+
+def utc_now():
+    """Current UTC time as a DATETIME literal (YYYY-MM-DD HH:MM:SS)"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+def dialect(connection):
+    """MYSQL or SQLITE for a connection returned by connect()"""
+    return getattr(connection, "dialect", MYSQL)
+
+def connect(config=None):
+    """A connection with autocommit off; raises the backend's error on failure"""
+    config = config or DbConfig()
+    if config.backend == SQLITE:
+        connection = SqliteConnection(config.sqlite_path)
+        connection._connection.executescript(SQLITE_SCHEMA)
+        return connection
+    if config.backend != MYSQL:
+        raise ValueError(f"Unknown DB_BACKEND {config.backend!r}, expected {MYSQL} or {SQLITE}")
+    return _mysql_pool(config).get_connection()
+
+def create_db_connection(config=None):
+    """Create and return a database connection"""
+    try:
+        connection = connect(config)
+        print("✅ Database connection established")
+        return connection
+    except DB_ERRORS as err:
+        print(f"❌ Database connection failed: {err}")
+        return None
+
+def is_retryable(error):
+    """Deadlocks, lock timeouts and lost connections are worth another attempt"""
+    if isinstance(error, mysql.connector.Error):
+        return error.errno in RETRYABLE_MYSQL_ERRORS
+    if isinstance(error, sqlite3.OperationalError):
+        return "locked" in str(error) or "busy" in str(error)
+    return False
+
+def run_in_transaction(connection, work, retries=DEFAULT_RETRIES):
+    """Run `work(cursor)` and commit, retrying the whole transaction on transient errors.
+
+    Only the current batch is rolled back and replayed, earlier commits are
+    kept. A lost MySQL connection is reconnected before the next attempt.
+    """
+    for attempt in range(retries + 1):
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            result = work(cursor)
+            connection.commit()
+            return result
+        except DB_ERRORS as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            lost = getattr(e, "errno", None) in LOST_CONNECTION_ERRORS
+            if lost:
+                connection.reconnect(attempts=3, delay=1)
+            else:
+                connection.rollback()
+            print(f"⚠️ Retrying transaction after: {e}")
+            time.sleep(0.1 * 2 ** attempt)
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except DB_ERRORS:
+                    pass
+
+def upsert_sql(connection, table, columns, key, preserved=()):
+    """INSERT that updates the row in place when `key` already exists"""
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        table, ", ".join(columns), ", ".join(["%s"] * len(columns))
+    )
+    if not key:
+        return sql
+    updated = [column for column in columns if column != key and column not in preserved]
+    if dialect(connection) == SQLITE:
+        return sql + f" ON CONFLICT ({key}) DO UPDATE SET " + ", ".join(
+            f"{column} = excluded.{column}" for column in updated)
+    return sql + " ON DUPLICATE KEY UPDATE " + ", ".join(
+        f"{column} = VALUES({column})" for column in updated)
@@ -0,0 +1,161 @@
+"""Batched INSERT / upsert writer shared by the importers, and the steps that end an import."""
+import json
+import time
+
+from db import DB_ERRORS, run_in_transaction, upsert_sql, utc_now
+from image_assets import AssetStore, summary as assets_summary, sync_assets
+from materialize_stats import refresh_stats
+from schema import KEY_COLUMN, METADATA_REPORT_COLUMN, SLUG_COLUMN
+
+FREELANCER_COLUMNS = (
+    "username", "profile_link", "profile_image", "rating", "reviews",
+    "short_description", "price", "category", "created_at", KEY_COLUMN, SLUG_COLUMN
+)
+
+# Columns left untouched when an upsert hits an existing row
+PRESERVED_ON_UPDATE = ("created_at",)
+
+# Flush thresholds
+DEFAULT_BATCH_ROWS = 500
+DEFAULT_BATCH_BYTES = 1 << 20  # Stay well below MySQL's default max_allowed_packet
+
+def _row_size(row):
+    """Rough size of a row on the wire, used for the byte threshold"""
+    return sum(len(value.encode("utf-8")) if isinstance(value, str) else 8 for value in row)
+
+class BatchedWriter:
+    """Buffers rows and writes them with one executemany and one commit per flush.
+
+    mysql.connector rewrites an executemany INSERT into a single multi-row
+    VALUES statement, so each flush is one round trip and one fsync. With
+    `upsert_key` set (the default for freelancers) rows whose key already
+    exists are updated in place (ON DUPLICATE KEY UPDATE, or ON CONFLICT on
+    sqlite) instead of being inserted again, and the keys written are kept
+    in `written_keys`.
+    """
+
+    def __init__(self, connection, table="freelancers", columns=FREELANCER_COLUMNS,
+                 batch_rows=DEFAULT_BATCH_ROWS, batch_bytes=DEFAULT_BATCH_BYTES, upsert_key=KEY_COLUMN,
+                 metrics=None):
+        self.connection = connection
+        self.metrics = metrics
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.sql = upsert_sql(connection, table, columns, upsert_key, PRESERVED_ON_UPDATE)
+        self._key_position = list(columns).index(upsert_key) if upsert_key else None
+        self.written_keys = set()
+        self._rows = []
+        self._bytes = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.write_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def add(self, row):
+        """Queue one row (a tuple in column order), flushing when a threshold is reached"""
+        self._rows.append(row)
+        self._bytes += _row_size(row)
+        if len(self._rows) >= self.batch_rows or self._bytes >= self.batch_bytes:
+            self.flush()
+
+    def flush(self):
+        """Write and commit everything buffered so far; returns the number of rows written"""
+        if not self._rows:
+            return 0
+        start = time.monotonic()
+        insert_seconds = 0.0
+
+        def insert(cursor):
+            nonlocal insert_seconds
+            insert_start = time.monotonic()
+            cursor.executemany(self.sql, self._rows)
+            insert_seconds += time.monotonic() - insert_start
+
+        # Each flush is its own transaction, retried on deadlocks and lost connections
+        run_in_transaction(self.connection, insert)
+        elapsed = time.monotonic() - start
+        if self.metrics:
+            # Whatever is not the INSERT itself is the commit (and any retry back-off)
+            self.metrics.add_time("db.insert", insert_seconds)
+            self.metrics.add_time("db.commit", elapsed - insert_seconds)
+            self.metrics.observe("db.flush_latency", elapsed)
+            self.metrics.count("db.rows", len(self._rows))
+        written = len(self._rows)
+        if self._key_position is not None:
+            self.written_keys.update(row[self._key_position] for row in self._rows)
+        self.rows_written += written
+        self.flushes += 1
+        self.write_seconds += elapsed
+        self._rows = []
+        self._bytes = 0
+        return written
+
+    @property
+    def pending(self):
+        return len(self._rows)
+
+    @property
+    def rows_per_sec(self):
+        """Rows written per second of wall time since the writer was created"""
+        elapsed = time.monotonic() - self.started_at
+        return self.rows_written / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def db_rows_per_sec(self):
+        """Rows written per second actually spent inside the database"""
+        return self.rows_written / self.write_seconds if self.write_seconds > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.rows_written} rows in {self.flushes} flushes "
+                f"({self.rows_per_sec:.0f} rows/s overall, {self.db_rows_per_sec:.0f} rows/s in DB)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+def finish_import(connection, writer, metrics, updated_by, counts=None, report_fields=None, assets_dir=None):
+    """Flush `writer`, record the run in metadata and bring the derived data up to date.
+
+    `counts` ({column: value}) adds columns to the metadata row and
+    `report_fields`, if given, stores the run report in metadata.run_report.
+    The statistics refresh and the asset stage (only with `assets_dir`) run
+    after the import is committed; their failures are reported but do not
+    fail the import. Returns the number of rows written.
+    """
+    writer.flush()
+    print(f"✅ Wrote {writer.summary()}")
+
+    columns = ["last_updated", "updated_by", "record_count"]
+    values = [utc_now(), updated_by, writer.rows_written]
+    for column, value in (counts or {}).items():
+        columns.append(column)
+        values.append(value)
+    if report_fields is not None:
+        columns.append(METADATA_REPORT_COLUMN)
+        values.append(json.dumps(metrics.report(**report_fields), ensure_ascii=False))
+    with metrics.timer("db.metadata"):
+        run_in_transaction(connection, lambda cursor: cursor.execute(f"""
+            INSERT INTO metadata ({', '.join(columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+        """, values))
+
+    # Refresh the statistics of the days this import touched
+    try:
+        days = refresh_stats(connection, writer.written_keys)
+        print(f"📊 Refreshed statistics for {days} days")
+    except DB_ERRORS as e:
+        connection.rollback()
+        print(f"⚠️ Statistics not refreshed ({e}); run materialize_stats.py --full")
+
+    if assets_dir:
+        try:
+            sync_assets(connection, AssetStore(assets_dir), writer.written_keys, metrics=metrics)
+            print(f"🖼️ {assets_summary(metrics)}")
+        except (*DB_ERRORS, OSError) as e:
+            connection.rollback()
+            print(f"⚠️ Images not stored ({e}); run image_assets.py")
+    return writer.rows_written
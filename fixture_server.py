@@ -0,0 +1,55 @@
+"""Local HTTP stand-in that serves saved HTML fixtures.
+
+A request for /programming/desktop-app?page=2 is answered with
+fixtures/khamsat/programming/desktop-app/page-2.html, and a request for a
+page such as /freelancer/technology-programming/jane-1 with
+fixtures/<site>/freelancer/technology-programming/jane-1.html. Point the
+scrapers at it with --base-url to run them without touching the real sites.
+"""
+import argparse
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Maps listing URLs (path + ?page=N) onto page-N.html files"""
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, ".html": "text/html; charset=utf-8"}
+
+    def translate_path(self, path):
+        parts = urlsplit(path)
+        page = parse_qs(parts.query).get("page", ["1"])[0]
+        relative = parts.path.strip("/")
+        candidate = os.path.join(self.directory, relative)
+        if os.path.isdir(candidate):
+            return os.path.join(candidate, f"page-{page}.html")
+        if not os.path.exists(candidate) and os.path.exists(candidate + ".html"):
+            return candidate + ".html"
+        return candidate
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fixture_server(site="khamsat", host="127.0.0.1", port=0):
+    """Start the server in a background thread and return (server, base_url)"""
+    directory = os.path.join(FIXTURES_DIR, site)
+    handler = lambda *args, **kwargs: FixtureHandler(*args, directory=directory, **kwargs)
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved HTML fixtures over HTTP")
+    parser.add_argument("--site", default="khamsat")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(args.site, port=args.port)
+    print(f"Serving fixtures for {args.site} at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,124 @@
+"""On-disk HTTP response cache with validators and size-bounded LRU eviction.
+
+Bodies live in <cache dir>/<sha256 of url>.html; validators, sizes and the
+LRU order live in index.json, which is written back by save().
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = ".http_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+INDEX_FILE = "index.json"
+
+class ResponseCache:
+    """URL-keyed response cache shared by the crawler's executor threads"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # url -> {"etag", "last_modified", "size"}, oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _body_path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for url, entry in entries:
+            if os.path.exists(self._body_path(url)):
+                self._entries[url] = entry
+                self.total_bytes += entry["size"]
+
+    def save(self):
+        """Persist the index (validators and LRU order)"""
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self._index_path())
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a cached URL, or {} when it is not cached"""
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url):
+        """Record a use of the cached copy (a 304 or an offline read)"""
+        with self._lock:
+            if url in self._entries:
+                self._entries.move_to_end(url)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def get(self, url):
+        """Cached body for `url`, or None"""
+        if not self.touch(url):
+            return None
+        try:
+            with open(self._body_path(url), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            with self._lock:
+                self._forget(url)
+            return None
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Save a fresh 200 response and evict least recently used entries over the size limit"""
+        path = self._body_path(url)
+        data = body.encode("utf-8")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.misses += 1
+            self._forget(url)
+            self._entries[url] = {"etag": etag, "last_modified": last_modified, "size": len(data)}
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._forget(oldest)
+                self._remove_body(oldest)
+                self.evictions += 1
+
+    def _forget(self, url):
+        entry = self._entries.pop(url, None)
+        if entry:
+            self.total_bytes -= entry["size"]
+
+    def _remove_body(self, url):
+        try:
+            os.remove(self._body_path(url))
+        except OSError:
+            pass
+
+    def summary(self):
+        return (f"{len(self._entries)} entries, {self.total_bytes / 1024 / 1024:.1f} MiB, "
+                f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions")
@@ -0,0 +1,372 @@
+"""Optional asset stage: local, content-addressed copies of the profile images.
+
+    python image_assets.py                       # every image URL in freelancers
+    python image_assets.py --max-age-days 7 --concurrency 4
+
+Each distinct image URL (after normalize_image_url) is fetched once, with
+at most `concurrency` downloads in flight and a per-host politeness limit.
+The bytes are stored as <directory>/originals/<ab>/<sha256>.<ext>, so the
+same avatar served under different URLs is kept once, and with Pillow
+installed a JPEG thumbnail per size in THUMB_SIZES is written under
+<directory>/thumbs/<size>/.
+
+image_assets maps every stored profile_image URL to its local copy, and
+get_freelancers.php serves the largest thumbnail (or the original) from
+there instead of hotlinking. Images fetched less than --max-age-days ago
+are not requested again; older ones are revalidated with ETag /
+Last-Modified. The importers run this stage for the rows they just wrote
+with --assets. The directory must be the assets/ folder of the web root
+for the front end to find the files.
+"""
+import argparse
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+
+from crawler import DEFAULT_HOST_RATE, HEADERS, REQUEST_TIMEOUT
+from db import DB_ERRORS, create_db_connection, run_in_transaction, upsert_sql, utc_now
+from metrics import Metrics, default_report_path
+from politeness import PolitenessScheduler
+from schema import ASSET_TABLE, ensure_asset_schema
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_ASSET_DIR = "assets"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Cards show the image 192px high; thumb_path points at the largest size
+THUMB_SIZES = (96, 320)
+THUMB_QUALITY = 85
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+KEY_CHUNK = 1000
+
+ASSET_COLUMNS = ("source_url", "normalized_url", "content_hash", "local_path", "thumb_path",
+                 "bytes", "etag", "last_modified", "fetched_at")
+
+# Extension by Content-Type, then by magic bytes for servers that send octet-stream
+EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp",
+              "image/svg+xml": "svg"}
+SIGNATURES = ((b"\xff\xd8\xff", "jpg"), (b"\x89PNG", "png"), (b"GIF8", "gif"))
+
+# Fetch outcomes
+OK = "ok"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+
+def normalize_image_url(url, base_url=None):
+    """Absolute http(s) URL with lowercased scheme and host and no fragment, or None"""
+    if not url or not url.strip():
+        return None
+    url = url.strip()
+    if url.startswith("//"):
+        url = "https:" + url
+    elif base_url:
+        url = urljoin(base_url, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+def image_extension(data, content_type=None):
+    """File extension for an image body, or None if it is not an image we keep"""
+    extension = EXTENSIONS.get((content_type or "").split(";")[0].strip().lower())
+    if extension:
+        return extension
+    for signature, extension in SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+class AssetStore:
+    """Content-addressed image files plus their thumbnails; paths are relative to `directory`"""
+
+    def __init__(self, directory=DEFAULT_ASSET_DIR, thumb_sizes=THUMB_SIZES):
+        self.directory = directory
+        self.thumb_sizes = tuple(sorted(thumb_sizes))
+        if self.thumb_sizes and Image is None:
+            print("⚠️ Pillow is not installed (pip install Pillow); storing images without thumbnails")
+            self.thumb_sizes = ()
+
+    def _full_path(self, relative):
+        return os.path.join(self.directory, *relative.split("/"))
+
+    def exists(self, relative):
+        return bool(relative) and os.path.exists(self._full_path(relative))
+
+    def _write(self, relative, data):
+        path = self._full_path(relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per thread, so two workers storing the same bytes never share a temp file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, data, extension):
+        """Store `data` once; returns (digest, original path, largest thumbnail path or None, newly stored)"""
+        digest = hashlib.sha256(data).hexdigest()
+        original = f"originals/{digest[:2]}/{digest}.{extension}"
+        stored = not self.exists(original)
+        if stored:
+            self._write(original, data)
+        thumb = None
+        if extension != "svg":
+            for size in self.thumb_sizes:
+                path = f"thumbs/{size}/{digest[:2]}/{digest}.jpg"
+                if not self.exists(path):
+                    thumbnail = self._thumbnail(data, size)
+                    if thumbnail is None:
+                        break
+                    self._write(path, thumbnail)
+                thumb = path
+        return digest, original, thumb, stored
+
+    def _thumbnail(self, data, size):
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.thumbnail((size, size))
+                if image.mode != "RGB":
+                    image = image.convert("RGB")
+                out = io.BytesIO()
+                image.save(out, "JPEG", quality=THUMB_QUALITY, optimize=True)
+                return out.getvalue()
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return None
+
+class ImageFetcher:
+    """Polite image downloads with a size cap; one requests.Session per thread"""
+
+    def __init__(self, scheduler=None, timeout=REQUEST_TIMEOUT, max_bytes=MAX_IMAGE_BYTES):
+        self.scheduler = scheduler or PolitenessScheduler(rate=DEFAULT_HOST_RATE)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(HEADERS)
+        return session
+
+    def fetch(self, url, etag=None, last_modified=None):
+        """(status, body, content type, etag, last modified) with status OK, NOT_MODIFIED or FAILED"""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        self.scheduler.wait(url)
+        try:
+            with self._session().get(url, headers=headers, timeout=self.timeout, stream=True) as r:
+                if r.status_code == 304:
+                    return NOT_MODIFIED, None, None, etag, last_modified
+                r.raise_for_status()
+                body = bytearray()
+                for chunk in r.iter_content(64 * 1024):
+                    body += chunk
+                    if len(body) > self.max_bytes:
+                        return FAILED, None, None, None, None
+                return OK, bytes(body), r.headers.get("Content-Type"), r.headers.get("ETag"), \
+                    r.headers.get("Last-Modified")
+        except requests.exceptions.RequestException:
+            return FAILED, None, None, None, None
+
+def _age_seconds(fetched_at):
+    if isinstance(fetched_at, str):
+        fetched_at = datetime.strptime(fetched_at, "%Y-%m-%d %H:%M:%S")
+    return time.time() - fetched_at.replace(tzinfo=timezone.utc).timestamp()
+
+def image_sources(connection, keys=None, table="freelancers"):
+    """{profile_image: profile_link} for every row, or only the rows with these source keys"""
+    sources = {}
+    cursor = connection.cursor()
+    try:
+        query = f"""
+            SELECT DISTINCT profile_image, profile_link FROM {table}
+            WHERE profile_image IS NOT NULL AND profile_image <> ''
+        """
+        if keys is None:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        else:
+            keys = list(keys)
+            rows = []
+            for start in range(0, len(keys), KEY_CHUNK):
+                chunk = keys[start:start + KEY_CHUNK]
+                cursor.execute(query + f" AND source_key IN ({', '.join(['%s'] * len(chunk))})", chunk)
+                rows.extend(cursor.fetchall())
+        for image, link in rows:
+            sources.setdefault(image, link)
+    finally:
+        cursor.close()
+    return sources
+
+def known_assets(connection, normalized_urls):
+    """Stored rows per normalized URL ({normalized: row dict}) and the set of source URLs already mapped"""
+    normalized_urls = list(normalized_urls)
+    known = {}
+    mapped = set()
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(normalized_urls), KEY_CHUNK):
+            chunk = normalized_urls[start:start + KEY_CHUNK]
+            cursor.execute(f"""
+                SELECT {', '.join(ASSET_COLUMNS)} FROM {ASSET_TABLE}
+                WHERE normalized_url IN ({', '.join(['%s'] * len(chunk))})
+            """, chunk)
+            for values in cursor.fetchall():
+                row = dict(zip(ASSET_COLUMNS, values))
+                mapped.add(row["source_url"])
+                previous = known.get(row["normalized_url"])
+                if previous is None or _age_seconds(row["fetched_at"]) < _age_seconds(previous["fetched_at"]):
+                    known[row["normalized_url"]] = row
+    finally:
+        cursor.close()
+    return known, mapped
+
+def _fetch_one(fetcher, store, normalized, previous, metrics):
+    """Runs in a download thread: fetch, store and return the asset row fields, or None"""
+    conditional = previous is not None and store.exists(previous["local_path"])
+    start = time.perf_counter()
+    status, body, content_type, etag, last_modified = fetcher.fetch(
+        normalized, previous["etag"] if conditional else None, previous["last_modified"] if conditional else None)
+    elapsed = time.perf_counter() - start
+    metrics.add_time("assets.fetch", elapsed)
+    metrics.observe("assets.latency", elapsed)
+    if status == NOT_MODIFIED:
+        metrics.count("assets.revalidated")
+        return {**previous, "fetched_at": utc_now()}
+    extension = image_extension(body, content_type) if status == OK else None
+    if extension is None:
+        metrics.count("assets.failed")
+        return None
+    try:
+        with metrics.timer("assets.store"):
+            digest, local_path, thumb_path, stored = store.put(body, extension)
+    except OSError as e:
+        # Disk full or an unwritable directory: skip the image, the rows are already imported
+        metrics.count("assets.failed")
+        print(f"⚠️ Could not store {normalized}: {e}")
+        return None
+    metrics.count("assets.downloaded")
+    metrics.count("assets.bytes", len(body))
+    if not stored:
+        # Identical bytes are already on disk under another URL
+        metrics.count("assets.deduped")
+    return {"normalized_url": normalized, "content_hash": digest, "local_path": local_path,
+            "thumb_path": thumb_path, "bytes": len(body), "etag": etag, "last_modified": last_modified,
+            "fetched_at": utc_now()}
+
+def write_assets(connection, rows):
+    """Upsert asset rows (dicts keyed by ASSET_COLUMNS) in chunks"""
+    sql = upsert_sql(connection, ASSET_TABLE, ASSET_COLUMNS, "source_url")
+    rows = [tuple(row[column] for column in ASSET_COLUMNS) for row in rows]
+    for start in range(0, len(rows), KEY_CHUNK):
+        chunk = rows[start:start + KEY_CHUNK]
+        run_in_transaction(connection, lambda cursor: cursor.executemany(sql, chunk))
+
+def sync_assets(connection, store=None, keys=None, concurrency=DEFAULT_CONCURRENCY, fetcher=None,
+                max_age=DEFAULT_MAX_AGE, metrics=None, table="freelancers"):
+    """Make sure every profile_image of `table` (or of the rows with `keys`) has a local copy.
+
+    Returns the number of distinct images handled; the counters (hits,
+    downloads, deduplicated files, failures) are added to `metrics`.
+    """
+    ensure_asset_schema(connection)
+    store = store or AssetStore()
+    fetcher = fetcher or ImageFetcher()
+    metrics = metrics or Metrics()
+    groups = {}
+    for source_url, profile_link in image_sources(connection, keys, table).items():
+        normalized = normalize_image_url(source_url, profile_link)
+        if normalized is None or len(source_url) > 512:
+            metrics.count("assets.invalid_url")
+            continue
+        groups.setdefault(normalized, []).append(source_url)
+    metrics.count("assets.urls", len(groups))
+    known, mapped = known_assets(connection, groups)
+
+    rows = []
+    todo = []
+    for normalized, sources in groups.items():
+        previous = known.get(normalized)
+        if previous and store.exists(previous["local_path"]) and _age_seconds(previous["fetched_at"]) < max_age:
+            metrics.count("assets.hit")
+            # Another spelling of a URL we already have: map it without fetching
+            rows.extend({**previous, "source_url": source_url} for source_url in sources if source_url not in mapped)
+        else:
+            todo.append((normalized, previous))
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="assets") as executor:
+        futures = {executor.submit(_fetch_one, fetcher, store, normalized, previous, metrics): normalized
+                   for normalized, previous in todo}
+        for future in as_completed(futures):
+            asset = future.result()
+            if asset is not None:
+                rows.extend({**asset, "source_url": source_url} for source_url in groups[futures[future]])
+    with metrics.timer("assets.db"):
+        write_assets(connection, rows)
+    return len(groups)
+
+def summary(metrics):
+    counters = metrics.counters
+    urls = counters.get("assets.urls", 0)
+    cached = counters.get("assets.hit", 0) + counters.get("assets.revalidated", 0)
+    rate = cached / urls if urls else 0.0
+    return (f"{urls} images: {counters.get('assets.hit', 0)} cached, "
+            f"{counters.get('assets.revalidated', 0)} revalidated ({rate:.0%} hit rate), "
+            f"{counters.get('assets.downloaded', 0)} downloaded "
+            f"({counters.get('assets.deduped', 0)} identical to a stored file, "
+            f"{counters.get('assets.bytes', 0) / 1024:.0f} KiB), {counters.get('assets.failed', 0)} failed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store local, deduplicated copies of the profile images")
+    parser.add_argument("--directory", default=DEFAULT_ASSET_DIR, help="Asset directory under the web root")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Downloads in flight")
+    parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE,
+                        help="Maximum requests per second against one image host")
+    parser.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE / 86400,
+                        help="Revalidate images fetched longer ago than this")
+    parser.add_argument("--no-thumbnails", action="store_true", help="Only keep the original files")
+    parser.add_argument("--report", default=default_report_path("assets"), help="Where to write the JSON report")
+    parser.add_argument("--no-report", action="store_true")
+    args = parser.parse_args()
+
+    connection = create_db_connection()
+    if connection:
+        metrics = Metrics()
+        try:
+            sync_assets(
+                connection,
+                AssetStore(args.directory, () if args.no_thumbnails else THUMB_SIZES),
+                concurrency=args.concurrency,
+                fetcher=ImageFetcher(PolitenessScheduler(rate=args.host_rate)),
+                max_age=args.max_age_days * 86400,
+                metrics=metrics,
+            )
+            print(f"🖼️ {summary(metrics)}")
+            if not args.no_report:
+                metrics.write_report(args.report, source="assets")
+                print(f"Report written to {args.report}")
+        except DB_ERRORS as e:
+            connection.rollback()
+            print(f"Database error: {e}")
+        finally:
+            connection.close()
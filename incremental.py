@@ -0,0 +1,72 @@
+"""Known-service index for incremental scraping.
+
+The index maps a 64-bit hash of each freelancers.source_key to a 64-bit
+fingerprint of the fields we scrape, so a catalog of 100k rows costs a few
+MiB and every scraped card can be classified as new, changed or unchanged
+without touching the database.
+"""
+import hashlib
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+def fingerprint(profile_image, rating, reviews, short_description, price, category):
+    """Hash of the mutable fields; values are normalized the way MySQL returns them"""
+    return _hash64("\x1f".join((
+        profile_image or "",
+        f"{float(rating or 0):.2f}",
+        str(int(reviews or 0)),
+        short_description or "",
+        f"{float(price or 0):.2f}",
+        category or "",
+    )))
+
+class KnownServices:
+    """Hashed set of known source keys with a fingerprint per key"""
+
+    def __init__(self):
+        self._fingerprints = {}
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def __contains__(self, key):
+        return _hash64(key) in self._fingerprints
+
+    @classmethod
+    def load(cls, connection, table="freelancers"):
+        """Stream every known row once at startup"""
+        known = cls()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT source_key, profile_image, rating, reviews, short_description, price, category
+                FROM {table} WHERE source_key IS NOT NULL
+            """)
+            for key, *fields in cursor:
+                known._fingerprints[_hash64(key)] = fingerprint(*fields)
+        finally:
+            cursor.close()
+        return known
+
+    def classify(self, key, profile_image, rating, reviews, short_description, price, category):
+        """Return NEW, CHANGED or UNCHANGED for a scraped row and remember it"""
+        key_hash = _hash64(key)
+        current = fingerprint(profile_image, rating, reviews, short_description, price, category)
+        previous = self._fingerprints.get(key_hash)
+        self._fingerprints[key_hash] = current
+        if previous is None:
+            self.new += 1
+            return NEW
+        if previous != current:
+            self.changed += 1
+            return CHANGED
+        self.unchanged += 1
+        return UNCHANGED
@@ -1,233 +1,489 @@
+import argparse
+import asyncio
+import functools
 import requests
-from bs4 import BeautifulSoup
 import re
+import threading
 import time
-import random
 import urllib.parse
-import mysql.connector
+from dataclasses import dataclass
 from datetime import datetime
+from crawler import BASE_URL, DEFAULT_CONCURRENCY, DEFAULT_HOST_RATE, build_targets
+from db import DB_ERRORS, create_db_connection, utc_now
+from db_writer import DEFAULT_BATCH_BYTES, DEFAULT_BATCH_ROWS, BatchedWriter, finish_import
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResponseCache
+from image_assets import DEFAULT_ASSET_DIR
+from parsers import BACKENDS, DEFAULT_BACKEND, make_backend
+from record_sink import DEFAULT_EXPORT_DIR, FORMATS, make_sink
+from pipeline import DEFAULT_PARSE_WORKERS, DEFAULT_QUEUE_SIZE, PipelineReport, run_pipeline
+from metrics import Metrics, default_report_path
+from incremental import NEW, UNCHANGED, KnownServices
+from schema import (adopt_legacy_rows, ensure_metadata_counts, ensure_metadata_report, ensure_upsert_schema,
+                    has_legacy_rows, legacy_service_key, service_key)
 
 # Constants - using exact values provided
 CURRENT_USER = "souhail4real"
-CURRENT_DATETIME = "2025-06-05 14:25:05"  # Format UTC YYYY-MM-DD HH:MM:SS
-
-# Database configuration
-DB_CONFIG = {
-    "host": "localhost",
-    "database": "freelancima",
-    "user": "root",
-    "password": ""
+
+# Category slugs under /programming crawled by default
+PROGRAMMING_CATEGORIES = [
+    "desktop-app",
+    "web-development",
+    "mobile-apps",
+]
+
+# Labels kept for slugs whose title-cased form differs from what we store
+CATEGORY_LABELS = {
+    "desktop-app": "Desktop Applications",
 }
 
-def create_db_connection():
-    """Create and return a database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG, autocommit=False)
-        print("✅ Database connection established")
-        return connection
-    except mysql.connector.Error as err:
-        print(f"❌ Database connection failed: {err}")
-        return None
+# Selectors tried in order to find the service cards on a listing page
+SERVICE_SELECTORS = [
+    "div[id^='service-']",  # This selector is now priority
+    "div.service-card", 
+    "div.product-card"
+]
+
+# Per-card selectors used by extract_service_data (compiled once per run)
+TITLE_SELECTOR = "div.product-body > h4 > a"
+TITLE_FALLBACK_SELECTOR = "a.card-service-link, a.url-product"
+PROFILE_LINK_SELECTOR = "a.seller-card__avatar-link, a[href^='/user/']"
+PROFILE_IMAGE_SELECTOR = "img.profile-img, img.avatar-img"
+SERVICE_IMAGE_SELECTOR = "img.product-img"
+RATING_SELECTOR = "div.service-rating span, .rating span"
+REVIEWS_SELECTOR = "div.product-body-rate.line-clamp-1 > a > ul > li.c-list__item.info"
+REVIEWS_FALLBACK_SELECTOR = ".service-stats .reviews, .evaluation-count"
+PRICE_SELECTOR = "div.product-body > div.product-price > div > span"
+PRICE_FALLBACK_SELECTOR = "span.service-price, .price"
+
+# Field patterns, compiled once; REVIEWS_RE and PRICE_RE try their preferred
+# format anywhere in the text before falling back to the first number
+SERVICE_ID_RE = re.compile(r'service-(\d+)')
+CATEGORY_SLUG_RE = re.compile(r'/programming/([^/]+)/')
+USERNAME_RE = re.compile(r'/user/([^/]+)')
+NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)')
+REVIEWS_RE = re.compile(r'(?:.*?\((\d+)\)|\D*(\d+))', re.DOTALL)
+PRICE_RE = re.compile(r'(?:.*?(\d+(?:\.\d+)?)\$|\D*(\d+))', re.DOTALL)
+
+KHAMSAT_URL = "https://khamsat.com"
+UNKNOWN_USERNAME = "unknown"
+DEFAULT_RATING = 4.0
+
+CARD_SELECTORS = [
+    TITLE_SELECTOR,
+    TITLE_FALLBACK_SELECTOR,
+    PROFILE_LINK_SELECTOR,
+    PROFILE_IMAGE_SELECTOR,
+    SERVICE_IMAGE_SELECTOR,
+    RATING_SELECTOR,
+    REVIEWS_SELECTOR,
+    REVIEWS_FALLBACK_SELECTOR,
+    PRICE_SELECTOR,
+    PRICE_FALLBACK_SELECTOR,
+]
 
-def extract_service_data(service_div, category="Desktop Applications"):
-    """Extract data from a service div using corrected selectors"""
+@dataclass(slots=True)
+class ServiceRecord:
+    """One Khamsat service card as extracted from a listing page"""
+    username: str = UNKNOWN_USERNAME
+    profile_link: str = ""
+    profile_image: str = ""
+    rating: float = DEFAULT_RATING
+    reviews: int = 0
+    short_description: str = ""
+    price: float = 0
+    category: str = ""
+    created_at: str = ""  # UTC, set when the page is parsed
+    service_id: str = ""  # source_key of the row, not exported
+    slug: str = ""  # category slug of the card's own link, if it had one
+
+    def row(self, key):
+        """The freelancers row in FREELANCER_COLUMNS order"""
+        return (
+            self.username, self.profile_link, self.profile_image, float(self.rating), int(self.reviews),
+            self.short_description, float(self.price), self.category, self.created_at, key,
+            self.slug or None
+        )
+
+def _select_field(service_div, field, selector, fallback=None, metrics=None):
+    """select_one with an optional fallback selector; counts hit / fallback / miss per field"""
+    if metrics is None:
+        element = service_div.select_one(selector)
+        if not element and fallback:
+            element = service_div.select_one(fallback)
+        return element
+    start = time.perf_counter()
+    element = service_div.select_one(selector)
+    outcome = "hit"
+    if not element and fallback:
+        element = service_div.select_one(fallback)
+        outcome = "fallback"
+    if not element:
+        outcome = "miss"
+    metrics.add_time(f"extract.{field}", time.perf_counter() - start)
+    metrics.count(f"selector.{field}.{outcome}")
+    return element
+
+# The same sellers show up on many listing pages
+_decode_username = functools.lru_cache(maxsize=4096)(urllib.parse.unquote)
+
+def _count_failure(metrics, field, reason):
+    if metrics:
+        metrics.count(f"parse.{field}.{reason}")
+
+def extract_service_data(service_div, category="Desktop Applications", metrics=None, created_at=None):
+    """Extract one service card into a ServiceRecord, or None if the card is malformed.
+
+    Every field is read with one select_one (plus its fallback) and one
+    compiled pattern. Fields that keep their default because the element
+    is missing or its text does not parse are counted in `metrics` as
+    parse.<field>.missing / parse.<field>.invalid.
+    """
     try:
-        data = {}
+        record = ServiceRecord(category=category, created_at=created_at or utc_now())
         
-        # Get service ID (only to avoid duplicates, not exported)
-        service_id = ""
-        div_id = service_div.get('id', '')
-        if div_id:
-            id_match = re.search(r'service-(\d+)', div_id)
-            if id_match:
-                service_id = id_match.group(1)
+        # Service ID (the row's source_key, not exported)
+        id_match = SERVICE_ID_RE.search(service_div.get('id') or '')
+        if id_match:
+            record.service_id = id_match.group(1)
         
         # Service title (short_description)
-        title_el = service_div.select_one("div.product-body > h4 > a")
-        if not title_el:
-            title_el = service_div.select_one("a.card-service-link, a.url-product")
-        
-        if title_el:
-            data['short_description'] = title_el.get('title', '') or title_el.text.strip()
-            service_href = title_el.get('href', '')
-            
+        title_el = _select_field(service_div, "title", TITLE_SELECTOR, TITLE_FALLBACK_SELECTOR, metrics)
+        if title_el is not None:
+            record.short_description = title_el.get('title', '') or title_el.text.strip()
             # Extract category if present
-            cat_match = re.search(r'/programming/([^/]+)/', service_href)
+            cat_match = CATEGORY_SLUG_RE.search(title_el.get('href', ''))
             if cat_match:
-                category = cat_match.group(1).replace('-', ' ').title()
-        else:
-            data['short_description'] = ""
+                record.slug = cat_match.group(1)
+                record.category = card_category(record.slug)
         
         # Profile link and username
-        profile_link = service_div.select_one("a.seller-card__avatar-link, a[href^='/user/']")
-        if profile_link:
+        profile_link = _select_field(service_div, "profile_link", PROFILE_LINK_SELECTOR, metrics=metrics)
+        if profile_link is not None:
             profile_href = profile_link.get('href', '')
-            data['profile_link'] = "https://khamsat.com" + profile_href if profile_href.startswith('/') else profile_href
-            username_match = re.search(r'/user/([^/]+)', profile_href)
+            record.profile_link = KHAMSAT_URL + profile_href if profile_href.startswith('/') else profile_href
+            username_match = USERNAME_RE.search(profile_href)
             if username_match:
                 # Decode Arabic usernames
-                encoded_username = username_match.group(1)
-                data['username'] = urllib.parse.unquote(encoded_username)
+                record.username = _decode_username(username_match.group(1))
             else:
-                data['username'] = "unknown"
+                _count_failure(metrics, "username", "invalid")
         else:
-            data['profile_link'] = ""
-            data['username'] = "unknown"
+            _count_failure(metrics, "username", "missing")
         
         # Profile image
-        profile_img = service_div.select_one("img.profile-img, img.avatar-img")
-        if not profile_img:
-            # Fallback to service image
-            profile_img = service_div.select_one("img.product-img")
-        data['profile_image'] = profile_img.get('src', '') if profile_img else ""
+        # Falls back to the service image
+        profile_img = _select_field(service_div, "profile_image", PROFILE_IMAGE_SELECTOR,
+                                    SERVICE_IMAGE_SELECTOR, metrics)
+        if profile_img is not None:
+            record.profile_image = profile_img.get('src', '')
         
         # Rating
-        rating_el = service_div.select_one("div.service-rating span, .rating span")
-        if rating_el and rating_el.text.strip():
-            try:
-                rating_text = rating_el.text.strip()
-                rating_match = re.search(r'(\d+(?:\.\d+)?)', rating_text)
-                data['rating'] = float(rating_match.group(1)) if rating_match else 4.0
-            except:
-                data['rating'] = 4.0
+        rating_el = _select_field(service_div, "rating", RATING_SELECTOR, metrics=metrics)
+        rating_text = rating_el.text.strip() if rating_el is not None else ""
+        if rating_text:
+            rating_match = NUMBER_RE.search(rating_text)
+            if rating_match:
+                record.rating = float(rating_match.group(1))
+            else:
+                _count_failure(metrics, "rating", "invalid")
         else:
-            data['rating'] = 4.0
-        
-        # Reviews
-        reviews_el = service_div.select_one("div.product-body-rate.line-clamp-1 > a > ul > li.c-list__item.info")
-        if not reviews_el:
-            reviews_el = service_div.select_one(".service-stats .reviews, .evaluation-count")
+            _count_failure(metrics, "rating", "missing")
         
-        if reviews_el:
-            reviews_text = reviews_el.text.strip()
-            # First look for format (49)
-            reviews_match = re.search(r'\((\d+)\)', reviews_text)
+        # Reviews: "(49)" first, otherwise the first number
+        reviews_el = _select_field(service_div, "reviews", REVIEWS_SELECTOR, REVIEWS_FALLBACK_SELECTOR, metrics)
+        if reviews_el is not None:
+            reviews_match = REVIEWS_RE.match(reviews_el.text)
             if reviews_match:
-                data['reviews'] = int(reviews_match.group(1))
+                record.reviews = int(reviews_match.group(1) or reviews_match.group(2))
             else:
-                # Standard format
-                reviews_match = re.search(r'(\d+)', reviews_text)
-                data['reviews'] = int(reviews_match.group(1)) if reviews_match else 0
+                _count_failure(metrics, "reviews", "invalid")
         else:
-            data['reviews'] = 0
+            _count_failure(metrics, "reviews", "missing")
         
-        # Price - without currency field
-        price_el = service_div.select_one("div.product-body > div.product-price > div > span")
-        if not price_el:
-            price_el = service_div.select_one("span.service-price, .price")
-        
-        if price_el:
-            price_text = price_el.text.strip()
-            # First check dollar format
-            dollar_match = re.search(r'(\d+(?:\.\d+)?)\$', price_text)
-            if dollar_match:
-                data['price'] = float(dollar_match.group(1))
+        # Price - without currency field: "12.5$" first, otherwise the first integer
+        price_el = _select_field(service_div, "price", PRICE_SELECTOR, PRICE_FALLBACK_SELECTOR, metrics)
+        if price_el is not None:
+            price_match = PRICE_RE.match(price_el.text)
+            if price_match:
+                dollars = price_match.group(1)
+                record.price = float(dollars) if dollars else int(price_match.group(2))
             else:
-                # Standard format
-                price_match = re.search(r'(\d+)', price_text)
-                data['price'] = int(price_match.group(1)) if price_match else 0
+                _count_failure(metrics, "price", "invalid")
         else:
-            data['price'] = 0
-        
-        # Category and timestamp
-        data['category'] = category
-        data['created_at'] = CURRENT_DATETIME
+            _count_failure(metrics, "price", "missing")
         
-        return data, service_id  # Return ID separately to avoid duplicates
-    except Exception as e:
+        return record
+    except (AttributeError, TypeError, ValueError) as e:
+        if metrics:
+            metrics.count("cards.failed")
         print(f"Error extracting data: {e}")
-        return None, None
-
-def scrape_and_import_khamsat():
-    url = "https://khamsat.com/programming/desktop-app"  # Default URL
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9,ar;q=0.8"
-    }
+        return None
+
+def make_parser(name=DEFAULT_BACKEND):
+    """Parser backend for one run, with every listing and card selector precompiled"""
+    return make_backend(name, SERVICE_SELECTORS + CARD_SELECTORS)
+
+def parse_listing_page(html, category="Desktop Applications", parser=None, metrics=None, created_at=None):
+    """Parse one listing page and run every service card through extract_service_data.
+
+    All cards of the page share one created_at, utc_now() unless given.
+    """
+    start = time.perf_counter()
+    soup = (parser or make_parser()).parse(html)
+    
+    # Try multiple selectors to find services
+    service_divs = []
+    for index, selector in enumerate(SERVICE_SELECTORS):
+        service_divs = soup.select(selector)
+        if len(service_divs) > 0:
+            break
+    
+    if metrics:
+        metrics.add_time("parse.html", time.perf_counter() - start)
+        metrics.count(f"selector.cards.{'miss' if not service_divs else 'fallback' if index else 'hit'}")
+        metrics.count("cards.found", len(service_divs))
+    created_at = created_at or utc_now()
+    return [extract_service_data(service_div, category, metrics, created_at) for service_div in service_divs]
+
+# Per process in the pool; per thread when parsing inline in several runs at once
+_worker = threading.local()
+
+def parse_target_page(target, html, backend=DEFAULT_BACKEND):
+    """Pipeline parse stage; runs in a worker process that keeps its own compiled parser.
+
+    Returns (results, metrics snapshot) so the per-selector counters of the
+    worker reach the run's metrics.
+    """
+    if not hasattr(_worker, "parsers"):
+        _worker.parsers = {}
+        _worker.metrics = Metrics()
+    parser = _worker.parsers.get(backend)
+    if parser is None:
+        parser = _worker.parsers[backend] = make_parser(backend)
+    _worker.metrics.reset()
+    results = parse_listing_page(html, category_label(target.category), parser, _worker.metrics)
+    return results, _worker.metrics.snapshot()
+
+@functools.lru_cache(maxsize=None)
+def card_category(slug):
+    """Category stored for a card whose link carries its own slug.
+
+    The slug is stored as source_slug and reclassify_freelancers.py
+    re-applies this to it, so a change here can be backfilled instead of
+    only affecting new imports.
+    """
+    return slug.replace('-', ' ').title()
+
+def category_label(slug):
+    """Human readable category used when a card does not carry its own slug"""
+    return CATEGORY_LABELS.get(slug) or slug.replace('-', ' ').title()
+
+def run_fields(writer, known, success, sink=None, cache=None):
+    """Run-level fields stored next to the metrics in the run report"""
+    fields = {"source": "khamsat", "success": success}
+    if writer:
+        fields["rows_written"] = writer.rows_written
+        fields["flushes"] = writer.flushes
+    if known is not None:
+        fields["incremental"] = {"new": known.new, "changed": known.changed, "unchanged": known.unchanged}
+    if sink:
+        fields["exported"] = sink.rows_written
+    if cache:
+        fields["cache"] = {"hits": cache.hits, "misses": cache.misses, "evictions": cache.evictions}
+    return fields
+
+def scrape_and_import_khamsat(categories=None, pages=(1,), concurrency=DEFAULT_CONCURRENCY,
+                              host_rate=DEFAULT_HOST_RATE, base_url=BASE_URL,
+                              batch_rows=DEFAULT_BATCH_ROWS, batch_bytes=DEFAULT_BATCH_BYTES,
+                              parser_backend=DEFAULT_BACKEND, parse_workers=DEFAULT_PARSE_WORKERS,
+                              queue_size=DEFAULT_QUEUE_SIZE, cache_dir=DEFAULT_CACHE_DIR,
+                              cache_max_bytes=DEFAULT_MAX_BYTES, offline=False, incremental=False,
+                              export_dir=None, export_format="jsonl", use_db=True,
+                              report_path=None, metadata_report=False, scheduler=None, metrics=None, assets_dir=None):
+    """Crawl the given categories/pages and import the services found.
+
+    Fetching, parsing and writing run as separate pipeline stages: pages are
+    fetched concurrently, parsed in `parse_workers` processes and written by
+    a single thread that owns the database connection.
+
+    Responses are kept in an on-disk cache under `cache_dir` (None disables
+    it) and revalidated with ETag / Last-Modified, so unchanged pages are
+    not parsed again. `offline=True` replays the whole run from the cache.
+
+    With `incremental=True` the known services are loaded from the database
+    first; only new or changed rows are written, and a category stops
+    paginating at the first page that holds no new service.
+
+    With `export_dir` every row is also appended to rotated export files
+    (see record_sink.py) before it reaches the database, and `use_db=False`
+    only writes those files; load_records.py imports them later.
+
+    Stage timings, selector counters and latency histograms are collected
+    in `metrics` (a new metrics.Metrics by default) and written as a JSON
+    run report to `report_path`; `metadata_report=True` also stores the
+    report in the metadata row.
+
+    Callers running several imports at once pass one politeness
+    `scheduler` to all of them instead of a per-run `host_rate`.
+
+    With `assets_dir` the profile images of the rows written are stored
+    locally afterwards (see image_assets.py).
+    """
+    categories = categories or PROGRAMMING_CATEGORIES
     
     connection = None
     cursor = None
+    cache = None
+    sink = None
+    writer = None
+    known = None
+    metrics = metrics or Metrics()
+    success = False
+    
+    if offline and not cache_dir:
+        print("Offline mode needs a response cache")
+        return False
+    if not use_db and (incremental or not export_dir):
+        print("Running without the database needs an export directory and no incremental mode")
+        return False
     
     try:
-        # Initialize database connection
-        connection = create_db_connection()
-        if not connection:
-            return False
-        
-        # Initialize cursor
-        cursor = connection.cursor()
-        
-        print(f"Scraping started by: {CURRENT_USER} at {CURRENT_DATETIME}")
-        r = requests.get(url, headers=headers, timeout=15)
-        r.raise_for_status()
-        
-        soup = BeautifulSoup(r.text, "html.parser")
+        if use_db:
+            # Initialize database connection
+            connection = create_db_connection()
+            if not connection:
+                return False
+            
+            # Initialize cursor
+            cursor = connection.cursor()
+            ensure_upsert_schema(connection)
+            ensure_metadata_counts(connection)
+            if metadata_report:
+                ensure_metadata_report(connection)
         
-        # Try multiple selectors to find services
-        selectors = [
-            "div[id^='service-']",  # This selector is now priority
-            "div.service-card", 
-            "div.product-card"
-        ]
+        print(f"Scraping started by: {CURRENT_USER} at {utc_now()} UTC")
+        print(f"Crawling {len(pages)} pages in each of {len(categories)} categories "
+              f"(concurrency={concurrency}, host rate={host_rate}/s)")
         
-        service_divs = []
-        for selector in selectors:
-            service_divs = soup.select(selector)
-            if len(service_divs) > 0:
-                print(f"Found {len(service_divs)} services with selector: {selector}")
-                break
+        exhausted = set()  # categories whose pagination has reached known services
+        answered = set()   # categories that returned a page in the current round
+        if incremental:
+            known = KnownServices.load(connection)
+            print(f"Incremental mode: {len(known)} known services loaded")
         
-        if not service_divs:
-            print("No services found with known selectors!")
-            return False
+        def stop_paginating(target):
+            """Nothing new on this page: do not fetch deeper pages of its category"""
+            exhausted.add(target.category)
         
+        cache = ResponseCache(cache_dir, cache_max_bytes) if cache_dir else None
         seen_services = set()  # To avoid duplicates
-        added_count = 0
+        legacy = connection is not None and has_legacy_rows(connection)
+        writer = BatchedWriter(connection, batch_rows=batch_rows, batch_bytes=batch_bytes,
+                               metrics=metrics) if connection else None
+        sink = make_sink(export_format, export_dir) if export_dir else None
         
-        for i, service_div in enumerate(service_divs):
-            print(f"Processing service {i+1}/{len(service_divs)}")
-            data, service_id = extract_service_data(service_div)
+        def write_page(target, parsed):
+            results, parse_metrics = parsed
+            metrics.merge(parse_metrics)
+            answered.add(target.category)
+            if not results:
+                print(f"No services found with known selectors on {target.url}")
+                stop_paginating(target)
+                return
+            print(f"Found {len(results)} services on {target.category} page {target.page}")
             
-            # Avoid duplicates by service ID or profile link
-            if data and data.get('username') != "unknown":
-                service_key = service_id or data.get('profile_link', '')
-                if service_key and service_key not in seen_services:
-                    # Insert into database
-                    cursor.execute("""
-                        INSERT INTO freelancers 
-                        (username, profile_link, profile_image, rating, reviews, 
-                         short_description, price, category, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        data['username'], 
-                        data['profile_link'], 
-                        data['profile_image'], 
-                        float(data['rating']),
-                        int(data['reviews']),
-                        data['short_description'], 
-                        float(data['price']), 
-                        data['category'], 
-                        data['created_at']
-                    ))
-                    
-                    added_count += 1
-                    seen_services.add(service_key)
-                    
-                    # Commit every 5 freelancers
-                    if added_count % 5 == 0:
-                        connection.commit()
-                        print(f"✅ Committed batch of 5 freelancers (total: {added_count})")
+            if legacy:
+                # Rows stored before services were keyed by id take over the id now
+                adopted = adopt_legacy_rows(connection, {
+                    legacy_service_key(record.profile_link, record.short_description):
+                        service_key(record.service_id, record.profile_link)
+                    for record in results if record and record.service_id
+                })
+                metrics.count("rows.adopted", adopted)
             
-            time.sleep(random.uniform(0.1, 0.3))  # Be nice to the server
+            page_new = 0
+            for record in results:
+                # Avoid duplicates within the run; across runs the upsert does it
+                if record and record.username != UNKNOWN_USERNAME:
+                    key = service_key(record.service_id, record.profile_link, record.short_description)
+                    if key and key not in seen_services:
+                        seen_services.add(key)
+                        if known is not None:
+                            with metrics.timer("classify"):
+                                status = known.classify(
+                                    key, record.profile_image, record.rating, record.reviews,
+                                    record.short_description, record.price, record.category
+                                )
+                            metrics.count(f"rows.{status}")
+                            page_new += status == NEW
+                            if status == UNCHANGED:
+                                continue
+                        row = record.row(key)
+                        # On disk first, so a database failure does not lose the row
+                        if sink:
+                            with metrics.timer("export"):
+                                sink.add(row)
+                        if writer:
+                            writer.add(row)
+            
+            if known is not None and page_new == 0:
+                stop_paginating(target)
+        
+        # A full run crawls every page at once; an incremental run goes one page
+        # deeper per round, only for the categories that still turned up new services
+        rounds = [[page] for page in pages] if incremental else [list(pages)]
+        report = PipelineReport()
+        for round_pages in rounds:
+            active = [slug for slug in categories if slug not in exhausted]
+            if not active:
+                break
+            answered.clear()
+            report = report.merge(asyncio.run(run_pipeline(
+                build_targets(active, round_pages, base_url=base_url),
+                functools.partial(parse_target_page, backend=parser_backend),
+                write_page,
+                concurrency=concurrency,
+                host_rate=host_rate,
+                scheduler=scheduler,
+                parse_workers=parse_workers,
+                queue_size=queue_size,
+                cache=cache,
+                offline=offline,
+                on_not_modified=stop_paginating if incremental else None,
+                metrics=metrics
+            )))
+            # Failed fetches (typically past the last page) end a category too
+            exhausted.update(slug for slug in active if slug not in answered)
+        stats = report.crawl
+        print(f"Fetched {stats.pages_ok} pages "
+              f"({stats.bytes_received / 1024:.0f} KiB) in {stats.elapsed:.1f}s, "
+              f"{stats.pages_not_modified} not modified, {stats.pages_failed} failed")
+        if known is not None:
+            print(f"Incremental: {known.new} new, {known.changed} changed, {known.unchanged} unchanged")
+        if cache:
+            print(f"Response cache: {cache.summary()}")
         
-        # Insert metadata
-        cursor.execute("""
-            INSERT INTO metadata (last_updated, updated_by, record_count)
-            VALUES (%s, %s, %s)
-        """, (CURRENT_DATETIME, CURRENT_USER, added_count))
+        if stats.pages_ok + stats.pages_not_modified == 0:
+            print("No pages could be fetched!")
+            if connection:
+                connection.rollback()
+            return False
         
-        # Final commit
-        connection.commit()
+        if sink:
+            sink.close()
+            print(f"📦 Exported {sink.summary()}")
+        if not writer:
+            report.print_summary()
+            success = True
+            return True
+        
+        report.print_summary()
+        added_count = finish_import(
+            connection, writer, metrics, CURRENT_USER,
+            counts={"new_count": known.new, "changed_count": known.changed} if known is not None else None,
+            report_fields=run_fields(writer, known, True, sink, cache) if metadata_report else None,
+            assets_dir=assets_dir
+        )
         
         print(f"✅ Successfully extracted and imported {added_count} freelancers to database")
         
@@ -244,6 +500,7 @@ def scrape_and_import_khamsat():
                 print(f"Price: {sample[7]}")
                 print(f"Reviews: {sample[5]}")
         
+        success = True
         return True
     
     except requests.exceptions.RequestException as e:
@@ -251,10 +508,12 @@ def scrape_and_import_khamsat():
             connection.rollback()
         print(f"Request error: {e}")
         return False
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
         if connection:
             connection.rollback()
         print(f"Database error: {e}")
+        if sink and sink.rows_written:
+            print(f"📦 {sink.rows_written} scraped records are in {sink.directory}/; load them with load_records.py")
         return False
     except Exception as e:
         if connection:
@@ -262,18 +521,100 @@ def scrape_and_import_khamsat():
         print(f"Unexpected error: {e}")
         return False
     finally:
+        if sink:
+            sink.close()
+        if cache:
+            cache.save()
+        print(f"⏱️ Slowest stages: {metrics.summary()}")
+        if report_path:
+            metrics.write_report(report_path, **run_fields(writer, known, success, sink, cache))
+            print(f"Run report written to {report_path}")
         if cursor:
             cursor.close()
         if connection:
             connection.close()
 
+def parse_pages(value):
+    """Parse a page range such as "1-5" or "1,3,4" into a list of page numbers"""
+    pages = []
+    for part in value.split(','):
+        if '-' in part:
+            start, end = part.split('-', 1)
+            pages.extend(range(int(start), int(end) + 1))
+        elif part.strip():
+            pages.append(int(part))
+    return pages
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Khamsat listings and import them into the database")
+    parser.add_argument("--categories", default=",".join(PROGRAMMING_CATEGORIES),
+                        help="Comma separated category slugs under /programming")
+    parser.add_argument("--pages", default="1", help='Pages to crawl per category, e.g. "1-5"')
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE,
+                        help="Maximum requests per second against one host")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="Site root, e.g. the address printed by fixture_server.py")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+                        help="Flush the insert buffer after this many rows")
+    parser.add_argument("--batch-bytes", type=int, default=DEFAULT_BATCH_BYTES,
+                        help="Flush the insert buffer after this many bytes")
+    parser.add_argument("--parser", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help="HTML parsing backend")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Parser processes (0 parses inline)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Capacity of the queues between pipeline stages")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="On-disk HTTP response cache")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used responses above this size")
+    parser.add_argument("--no-cache", action="store_true", help="Always download full pages")
+    parser.add_argument("--offline", action="store_true",
+                        help="Run the full pipeline from the response cache without network access")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip known services and stop paginating at the first page with nothing new")
+    parser.add_argument("--export-dir", nargs="?", const=DEFAULT_EXPORT_DIR,
+                        help=f"Also stream every record into rotated files here (default {DEFAULT_EXPORT_DIR}/)")
+    parser.add_argument("--export-format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--assets", nargs="?", const=DEFAULT_ASSET_DIR,
+                        help=f"Store local copies of the profile images here (default {DEFAULT_ASSET_DIR}/)")
+    parser.add_argument("--no-db", action="store_true",
+                        help="Only write export files; import them later with load_records.py")
+    parser.add_argument("--report", default=default_report_path("khamsat"),
+                        help="Where to write the JSON run report (timings, selector counters, histograms)")
+    parser.add_argument("--no-report", action="store_true", help="Do not write a run report")
+    parser.add_argument("--metadata-report", action="store_true",
+                        help="Also store the run report in the metadata row")
+    args = parser.parse_args()
+    
     print("=== Khamsat Scraper and Database Importer ===")
     print(f"Current user: {CURRENT_USER}")
-    print(f"Timestamp: {CURRENT_DATETIME}")
+    print(f"Timestamp: {utc_now()} UTC")
     print("=" * 50)
     
-    success = scrape_and_import_khamsat()
+    success = scrape_and_import_khamsat(
+        categories=[c.strip() for c in args.categories.split(',') if c.strip()],
+        pages=parse_pages(args.pages),
+        concurrency=args.concurrency,
+        host_rate=args.host_rate,
+        base_url=args.base_url,
+        batch_rows=args.batch_rows,
+        batch_bytes=args.batch_bytes,
+        parser_backend=args.parser,
+        parse_workers=args.parse_workers,
+        queue_size=args.queue_size,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        offline=args.offline,
+        incremental=args.incremental,
+        export_dir=args.export_dir or (DEFAULT_EXPORT_DIR if args.no_db else None),
+        export_format=args.export_format,
+        use_db=not args.no_db,
+        assets_dir=args.assets,
+        report_path=None if args.no_report else args.report,
+        metadata_report=args.metadata_report
+    )
     
     if success:
         print("\n✅ Scraping and database import completed successfully!")
@@ -0,0 +1,147 @@
+"""Bulk-load export files written by the scrapers into freelancers.
+
+    python load_records.py                       # every finished file under exports/
+    python load_records.py exports/freelancers-20250605-142505-0001.jsonl
+    python load_records.py --method infile       # MySQL LOAD DATA LOCAL INFILE (needs DB_LOCAL_INFILE=1)
+
+Files are loaded oldest first and moved to <directory>/loaded/ once their
+rows are committed, so a rerun only picks up what is left. Both methods
+upsert on source_key, so loading a file twice is harmless.
+
+--method batch (the default, works on every backend) sends the rows
+through BatchedWriter. --method infile converts each file to a tab
+separated temp file, loads it into a temporary staging table with LOAD
+DATA LOCAL INFILE and upserts from there with one INSERT ... SELECT.
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from db import DB_ERRORS, MYSQL, create_db_connection, dialect, run_in_transaction
+from db_writer import DEFAULT_BATCH_BYTES, DEFAULT_BATCH_ROWS, FREELANCER_COLUMNS, PRESERVED_ON_UPDATE, BatchedWriter
+from materialize_stats import refresh_stats
+from record_sink import DEFAULT_EXPORT_DIR, read_records
+from schema import KEY_COLUMN, ensure_upsert_schema
+
+METHODS = ("batch", "infile")
+STAGING_TABLE = "freelancers_staging"
+
+def find_files(directory=DEFAULT_EXPORT_DIR):
+    """Finished export files, oldest first; .part files are still being written"""
+    paths = glob.glob(os.path.join(directory, "*.jsonl")) + glob.glob(os.path.join(directory, "*.parquet"))
+    return sorted(paths, key=os.path.basename)
+
+def _tsv_field(value):
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+def load_batch(connection, path, batch_rows=DEFAULT_BATCH_ROWS, batch_bytes=DEFAULT_BATCH_BYTES):
+    """Upsert one file through BatchedWriter; returns (rows, keys)"""
+    writer = BatchedWriter(connection, batch_rows=batch_rows, batch_bytes=batch_bytes)
+    with writer:
+        for row in read_records(path):
+            writer.add(row)
+    return writer.rows_written, writer.written_keys
+
+def load_infile(connection, path, table="freelancers"):
+    """Upsert one file through LOAD DATA LOCAL INFILE and a staging table; returns (rows, keys)"""
+    # Last record wins for a key, as it would with row-by-row upserts
+    records = {}
+    key_position = FREELANCER_COLUMNS.index(KEY_COLUMN)
+    for row in read_records(path):
+        records.pop(row[key_position], None)
+        records[row[key_position]] = row
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tsv", delete=False) as f:
+        for row in records.values():
+            f.write("\t".join(_tsv_field(value) for value in row) + "\n")
+        tsv_path = f.name
+    columns = ", ".join(FREELANCER_COLUMNS)
+    updates = ", ".join(f"{column} = VALUES({column})" for column in FREELANCER_COLUMNS
+                        if column != KEY_COLUMN and column not in PRESERVED_ON_UPDATE)
+
+    def load(cursor):
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {STAGING_TABLE}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {STAGING_TABLE} SELECT {columns} FROM {table} WHERE 1 = 0")
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {STAGING_TABLE}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+            ({columns})
+        """, (tsv_path,))
+        cursor.execute(f"""
+            INSERT INTO {table} ({columns})
+            SELECT {columns} FROM {STAGING_TABLE}
+            ON DUPLICATE KEY UPDATE {updates}
+        """)
+        cursor.execute(f"DROP TEMPORARY TABLE {STAGING_TABLE}")
+
+    try:
+        run_in_transaction(connection, load)
+    finally:
+        os.remove(tsv_path)
+    return len(records), set(records)
+
+def load_files(paths, method="batch", archive=True, batch_rows=DEFAULT_BATCH_ROWS, batch_bytes=DEFAULT_BATCH_BYTES):
+    """Load `paths` in order; returns the number of rows loaded or None on error"""
+    connection = create_db_connection()
+    if not connection:
+        return None
+    if method == "infile" and dialect(connection) != MYSQL:
+        print("LOAD DATA LOCAL INFILE needs the MySQL backend; use --method batch")
+        connection.close()
+        return None
+    total = 0
+    keys = set()
+    started_at = time.monotonic()
+    try:
+        ensure_upsert_schema(connection)
+        for path in paths:
+            start = time.monotonic()
+            if method == "infile":
+                rows, file_keys = load_infile(connection, path)
+            else:
+                rows, file_keys = load_batch(connection, path, batch_rows, batch_bytes)
+            total += rows
+            keys.update(file_keys)
+            elapsed = time.monotonic() - start
+            print(f"  {os.path.basename(path)}: {rows} rows in {elapsed:.1f}s "
+                  f"({rows / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+            if archive:
+                loaded_dir = os.path.join(os.path.dirname(path), "loaded")
+                os.makedirs(loaded_dir, exist_ok=True)
+                shutil.move(path, os.path.join(loaded_dir, os.path.basename(path)))
+        days = refresh_stats(connection, keys)
+        elapsed = time.monotonic() - started_at
+        print(f"📊 Refreshed statistics for {days} days")
+        print(f"Loaded {total} rows from {len(paths)} files in {elapsed:.1f}s "
+              f"({total / elapsed if elapsed > 0 else 0:.0f} rows/s)")
+        return total
+    except DB_ERRORS as e:
+        connection.rollback()
+        print(f"Database error: {e}")
+        return None
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load scraper export files into the database")
+    parser.add_argument("paths", nargs="*", help=f"Export files (default: every finished file in {DEFAULT_EXPORT_DIR}/)")
+    parser.add_argument("--directory", default=DEFAULT_EXPORT_DIR, help="Where to look when no paths are given")
+    parser.add_argument("--method", choices=METHODS, default="batch")
+    parser.add_argument("--keep", action="store_true", help="Leave loaded files in place instead of moving them to loaded/")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--batch-bytes", type=int, default=DEFAULT_BATCH_BYTES)
+    args = parser.parse_args()
+
+    paths = args.paths or find_files(args.directory)
+    if not paths:
+        print(f"No export files found in {args.directory}/")
+    else:
+        loaded = load_files(paths, args.method, not args.keep, args.batch_rows, args.batch_bytes)
+        print("\n✅ Load completed" if loaded is not None else "\n❌ Load failed")
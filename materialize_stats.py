@@ -0,0 +1,199 @@
+"""Materialized statistics behind statistics.php.
+
+freelancer_stats_daily holds one row per (day, category, price range,
+rating range) with counts, sums, MIN and MAX, which is everything
+FreelancerStats needs: averages are sums divided by counts, monthly trends
+and the all-time totals are sums over days. The importers call
+refresh_stats() with the keys they just wrote, which recomputes only the
+days those rows belong to (reclassify_freelancers.py does the same with
+refresh_rows for the rows it updates). The first refresh, on a missing
+or empty summary table, rebuilds it in full so the statistics page never
+sees a partial summary. A full rebuild and a consistency check against
+the live table are available from the command line:
+
+    python materialize_stats.py --full
+    python materialize_stats.py --check
+
+Rows without created_at are not counted.
+"""
+import argparse
+import math
+import sys
+import time
+from datetime import date, timedelta
+
+from db import DB_ERRORS, create_db_connection, run_in_transaction, utc_now
+from schema import STATS_TABLE, ensure_stats_schema
+
+# Same buckets and labels as FreelancerStats::getPriceRangeStats / getRatingDistribution
+PRICE_RANGE_SQL = """CASE
+    WHEN price < 20 THEN 'Below $20'
+    WHEN price >= 20 AND price < 30 THEN '$20-$29'
+    WHEN price >= 30 AND price < 40 THEN '$30-$39'
+    WHEN price >= 40 AND price < 50 THEN '$40-$49'
+    ELSE '$50 and above'
+END"""
+RATING_RANGE_SQL = """CASE
+    WHEN rating < 4.0 THEN 'Below 4.0'
+    WHEN rating >= 4.0 AND rating < 4.5 THEN '4.0-4.4'
+    WHEN rating >= 4.5 AND rating < 4.8 THEN '4.5-4.7'
+    WHEN rating >= 4.8 AND rating < 5.0 THEN '4.8-4.9'
+    ELSE '5.0'
+END"""
+
+STATS_KEY = ("stat_date", "category", "price_range", "rating_range")
+STATS_VALUES = ("freelancer_count", "rated_count", "rating_sum", "priced_count", "price_sum",
+                "reviews_sum", "min_price", "max_price")
+KEY_CHUNK = 1000
+
+def _aggregate_sql(table, where):
+    return f"""
+        SELECT DATE(created_at), COALESCE(category, ''), {PRICE_RANGE_SQL}, {RATING_RANGE_SQL},
+               COUNT(*), COUNT(rating), COALESCE(SUM(rating), 0), COUNT(price), COALESCE(SUM(price), 0),
+               COALESCE(SUM(reviews), 0), MIN(price), MAX(price)
+        FROM {table}
+        WHERE {where}
+        GROUP BY 1, 2, 3, 4
+    """
+
+def _insert_sql(table, where):
+    return f"""
+        INSERT INTO {STATS_TABLE} ({', '.join(STATS_KEY + STATS_VALUES)}, refreshed_at)
+        SELECT agg.*, %s FROM ({_aggregate_sql(table, where)}) agg
+    """
+
+def _as_date(value):
+    """DATE() comes back as a date from MySQL and as an ISO string from sqlite"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+def touched_days(connection, keys, table="freelancers", column="source_key"):
+    """Distinct created_at days of the rows whose `column` is one of `keys`"""
+    keys = list(keys)
+    days = set()
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(keys), KEY_CHUNK):
+            chunk = keys[start:start + KEY_CHUNK]
+            cursor.execute(f"""
+                SELECT DISTINCT DATE(created_at) FROM {table}
+                WHERE {column} IN ({', '.join(['%s'] * len(chunk))}) AND created_at IS NOT NULL
+            """, chunk)
+            days.update(_as_date(day) for (day,) in cursor.fetchall())
+    finally:
+        cursor.close()
+    return days
+
+def refresh_days(connection, days, table="freelancers"):
+    """Recompute the summary rows of each day from that day's rows only (a created_at range scan)"""
+    refreshed_at = utc_now()
+
+    def refresh(cursor):
+        for day in sorted(days):
+            cursor.execute(f"DELETE FROM {STATS_TABLE} WHERE stat_date = %s", (day.isoformat(),))
+            cursor.execute(
+                _insert_sql(table, "created_at >= %s AND created_at < %s"),
+                (refreshed_at, day.isoformat(), (day + timedelta(days=1)).isoformat())
+            )
+    run_in_transaction(connection, refresh)
+    return len(days)
+
+def _summary_days(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(DISTINCT stat_date) FROM {STATS_TABLE}")
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+def _refresh(connection, keys, table, column):
+    ensure_stats_schema(connection, table)
+    if not _summary_days(connection):
+        # FreelancerStats reads the summary as soon as it has a row, so the
+        # first build must cover every day, not only the ones just written
+        rebuild_stats(connection, table)
+        return _summary_days(connection)
+    return refresh_days(connection, touched_days(connection, keys, table, column), table)
+
+def refresh_stats(connection, keys, table="freelancers"):
+    """Bring the summary up to date after an import that wrote `keys`; returns the days refreshed.
+
+    A missing or empty summary table is rebuilt in full instead.
+    """
+    if not keys:
+        return 0
+    return _refresh(connection, keys, table, "source_key")
+
+def refresh_rows(connection, ids, table="freelancers"):
+    """Same as refresh_stats for rows identified by id, e.g. after their category was rewritten"""
+    if not ids:
+        return 0
+    return _refresh(connection, ids, table, "id")
+
+def rebuild_stats(connection, table="freelancers"):
+    """Recompute the whole summary table in one transaction"""
+    ensure_stats_schema(connection, table)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {STATS_TABLE}")
+        cursor.execute(_insert_sql(table, "created_at IS NOT NULL"), (utc_now(),))
+        rows = cursor.rowcount
+        connection.commit()
+        return rows
+    finally:
+        cursor.close()
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-6)
+
+def check_stats(connection, table="freelancers"):
+    """Compare the summary with a full recomputation; returns a list of (key, column, stored, live)"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(_aggregate_sql(table, "created_at IS NOT NULL"))
+        live = {tuple(row[:4]): row[4:] for row in cursor.fetchall()}
+        cursor.execute(f"SELECT {', '.join(STATS_KEY + STATS_VALUES)} FROM {STATS_TABLE}")
+        stored = {tuple(row[:4]): row[4:] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    mismatches = []
+    for key in sorted(live.keys() | stored.keys(), key=str):
+        if key not in stored or key not in live:
+            mismatches.append((key, "row", "present" if key in stored else "missing",
+                               "present" if key in live else "missing"))
+            continue
+        for column, stored_value, live_value in zip(STATS_VALUES, stored[key], live[key]):
+            if not _same(stored_value, live_value):
+                mismatches.append((key, column, stored_value, live_value))
+    return mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or verify the materialized freelancer statistics")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--full", action="store_true", help="Recompute the whole summary table")
+    mode.add_argument("--check", action="store_true", help="Compare the summary with a full recomputation")
+    args = parser.parse_args()
+
+    connection = create_db_connection()
+    if not connection:
+        sys.exit(1)
+    try:
+        start = time.monotonic()
+        if args.full:
+            rows = rebuild_stats(connection)
+            print(f"\n✅ Rebuilt {STATS_TABLE}: {rows} summary rows in {time.monotonic() - start:.1f}s")
+        else:
+            mismatches = check_stats(connection)
+            for key, column, stored, live in mismatches[:20]:
+                print(f"  {' / '.join(map(str, key))}: {column} stored={stored} live={live}")
+            if mismatches:
+                print(f"\n❌ {len(mismatches)} differences; run with --full to rebuild")
+                sys.exit(1)
+            print(f"\n✅ {STATS_TABLE} matches the live table ({time.monotonic() - start:.1f}s)")
+    except DB_ERRORS as e:
+        connection.rollback()
+        print(f"Database error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
@@ -0,0 +1,178 @@
+"""Run metrics: stage timers, counters and latency histograms.
+
+One Metrics object is shared by a run. Parser processes fill their own
+and ship snapshot() back with each page; merge() folds those into the
+run's object, so per-selector counters survive the process pool. At the
+end the run writes report() as JSON and prints summary().
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; the last bucket catches everything slower
+LATENCY_BOUNDS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_REPORT_DIR = "reports"
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds values <= bounds[i], the last slot the rest"""
+
+    def __init__(self, bounds=LATENCY_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th value (max for the overflow bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+    @classmethod
+    def from_dict(cls, data, bounds=LATENCY_BOUNDS):
+        histogram = cls(bounds)
+        histogram.counts = list(data["buckets"].values())
+        histogram.count = data["count"]
+        histogram.total = (data["mean"] or 0.0) * data["count"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+class Metrics:
+    """Thread-safe registry of timers ({name: [calls, seconds]}), counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+
+    def add_time(self, name, seconds, calls=1):
+        with self._lock:
+            timer = self.timers.setdefault(name, [0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value, bounds=LATENCY_BOUNDS):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(bounds)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """Plain, picklable copy; cheap enough to send back with every parsed page"""
+        with self._lock:
+            return {
+                "timers": {name: list(timer) for name, timer in self.timers.items()},
+                "counters": dict(self.counters),
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def merge(self, snapshot):
+        """Fold a snapshot() taken elsewhere (e.g. in a parser process) into this registry"""
+        if not snapshot:
+            return
+        for name, (calls, seconds) in snapshot["timers"].items():
+            self.add_time(name, seconds, calls)
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+        with self._lock:
+            for name, data in snapshot["histograms"].items():
+                other = Histogram.from_dict(data)
+                if name in self.histograms:
+                    self.histograms[name].merge(other)
+                else:
+                    self.histograms[name] = other
+
+    def report(self, **extra):
+        """JSON-ready run report; `extra` adds run fields such as the source or row counts"""
+        data = self.snapshot()
+        data["timers"] = {
+            name: {"calls": calls, "seconds": round(seconds, 6),
+                   "mean_ms": round(seconds / calls * 1000, 3) if calls else None}
+            for name, (calls, seconds) in sorted(data["timers"].items())
+        }
+        data["counters"] = dict(sorted(data["counters"].items()))
+        return {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(self.started_at)),
+            "elapsed_seconds": round(time.time() - self.started_at, 3),
+            **extra,
+            **data,
+        }
+
+    def write_report(self, path, **extra):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        report = self.report(**extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+    def summary(self, top=6):
+        """The timers that took longest, e.g. to see which stage to scale"""
+        with self._lock:
+            timers = sorted(self.timers.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return ", ".join(f"{name} {seconds:.2f}s/{calls}" for name, (calls, seconds) in timers)
+
+def default_report_path(source, directory=DEFAULT_REPORT_DIR):
+    return os.path.join(directory, f"{source}-{time.strftime('%Y%m%d-%H%M%S')}.json")
@@ -0,0 +1,88 @@
+"""Pluggable HTML parsing backends.
+
+extract_service_data only needs select_one(), get() and .text from the nodes
+it is handed, so every backend returns nodes with that small BeautifulSoup
+compatible surface:
+
+- "bs4":  BeautifulSoup with html.parser (the original, pure Python)
+- "lxml": libxml2 parsing with CSS selectors compiled once to XPath
+"""
+from bs4 import BeautifulSoup
+from cssselect import HTMLTranslator
+from lxml import etree, html as lxml_html
+
+DEFAULT_BACKEND = "lxml"
+
+class Bs4Backend:
+    """The original BeautifulSoup / soupsieve path; its Tags already have the node API"""
+    name = "bs4"
+
+    def parse(self, text):
+        return BeautifulSoup(text, "html.parser")
+
+    def precompile(self, selectors):
+        pass
+
+class LxmlNode:
+    """Wraps an lxml element with the subset of the bs4 Tag API the extractors use"""
+    __slots__ = ("element", "backend")
+
+    def __init__(self, element, backend):
+        self.element = element
+        self.backend = backend
+
+    def select(self, selector):
+        return [LxmlNode(e, self.backend) for e in self.backend.compiled(selector)(self.element)]
+
+    def select_one(self, selector):
+        matches = self.backend.compiled(selector)(self.element)
+        return LxmlNode(matches[0], self.backend) if matches else None
+
+    def get(self, attribute, default=None):
+        return self.element.get(attribute, default)
+
+    @property
+    def text(self):
+        return self.element.text_content()
+
+class LxmlBackend:
+    """lxml parser with a per-run cache of CSS selectors compiled to XPath"""
+    name = "lxml"
+
+    def __init__(self):
+        self._translator = HTMLTranslator()
+        self._compiled = {}
+
+    def compiled(self, selector):
+        xpath = self._compiled.get(selector)
+        if xpath is None:
+            # descendant:: (not descendant-or-self::) so a node never matches itself, as in soupsieve
+            xpath = etree.XPath(self._translator.css_to_xpath(selector, prefix="descendant::"))
+            self._compiled[selector] = xpath
+        return xpath
+
+    def precompile(self, selectors):
+        for selector in selectors:
+            self.compiled(selector)
+
+    def parse(self, text):
+        try:
+            root = lxml_html.document_fromstring(text)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration must be passed as bytes
+            root = lxml_html.document_fromstring(text.encode("utf-8"))
+        return LxmlNode(root, self)
+
+BACKENDS = {
+    Bs4Backend.name: Bs4Backend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+def make_backend(name=DEFAULT_BACKEND, selectors=()):
+    """Create a backend for one run with `selectors` compiled up front"""
+    try:
+        backend = BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown parser backend {name!r}, expected one of {sorted(BACKENDS)}")
+    backend.precompile(selectors)
+    return backend
@@ -0,0 +1,187 @@
+"""Three-stage import pipeline: async fetch -> process-pool parse -> DB write.
+
+Stages are connected by bounded asyncio queues. When the parsers fall
+behind, fetchers block on the full queue while still holding their crawl
+slot, and a slow writer backs up into the parsers the same way, so memory
+stays bounded by the queue sizes.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from crawler import DEFAULT_CONCURRENCY, DEFAULT_HOST_RATE, crawl
+
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 2
+DEFAULT_QUEUE_SIZE = 32
+_DONE = object()
+
+@dataclass
+class StageStats:
+    """Items handled and time spent inside one stage"""
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def rate(self):
+        return self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+class GaugedQueue(asyncio.Queue):
+    """asyncio.Queue that samples its depth on every put"""
+
+    def __init__(self, name, maxsize):
+        super().__init__(maxsize)
+        self.name = name
+        self.max_depth = 0
+        self._samples = 0
+        self._depth_total = 0
+
+    async def put(self, item):
+        await super().put(item)
+        depth = self.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._samples += 1
+        self._depth_total += depth
+
+    def absorb(self, other):
+        """Fold the depth samples of the same queue from a later run into this one"""
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self._samples += other._samples
+        self._depth_total += other._depth_total
+
+    async def close(self):
+        """Enqueue the end-of-stream marker without counting it as a depth sample"""
+        await asyncio.Queue.put(self, _DONE)
+
+    @property
+    def mean_depth(self):
+        return self._depth_total / self._samples if self._samples else 0.0
+
+@dataclass
+class PipelineReport:
+    crawl: object = None
+    stages: list = field(default_factory=list)
+    queues: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def merge(self, other):
+        """Combine the report of a later run (e.g. the next pagination round) into this one"""
+        if self.crawl is None:
+            return other
+        self.crawl.merge(other.crawl)
+        for stage, later in zip(self.stages, other.stages):
+            stage.items += later.items
+            stage.busy_seconds += later.busy_seconds
+        for queue, later in zip(self.queues, other.queues):
+            queue.absorb(later)
+        self.elapsed += other.elapsed
+        return self
+
+    def print_summary(self):
+        print(f"\nPipeline finished in {self.elapsed:.1f}s")
+        for stage in self.stages:
+            overall = stage.items / self.elapsed if self.elapsed > 0 else 0.0
+            print(f"  {stage.name:<6} {stage.items:6d} items  {stage.busy_seconds:7.2f}s busy  "
+                  f"{stage.rate:8.1f} items/s per worker  {overall:8.1f} items/s overall")
+        for queue in self.queues:
+            print(f"  queue {queue.name:<6} capacity {queue.maxsize:3d}  max depth {queue.max_depth:3d}  "
+                  f"mean depth {queue.mean_depth:5.1f}")
+
+async def run_pipeline(targets, parse_page, write_page, concurrency=DEFAULT_CONCURRENCY,
+                       host_rate=DEFAULT_HOST_RATE, scheduler=None, parse_workers=DEFAULT_PARSE_WORKERS,
+                       queue_size=DEFAULT_QUEUE_SIZE, metrics=None, **crawl_options):
+    """Fetch `targets`, parse them with `parse_page(target, html)` and store them with `write_page(target, results)`.
+
+    `parse_page` runs in a ProcessPoolExecutor with `parse_workers` processes
+    (so it must be a picklable module-level function); with parse_workers=0
+    it runs inline, which is handy for debugging. `write_page` runs in a
+    single thread, one page at a time, so it can own the DB connection.
+    Remaining keyword arguments (cache, offline, on_not_modified) are passed
+    through to crawler.crawl. With `metrics`, fetch timings are recorded by
+    the crawler and the parse and write stages add their busy time and a
+    per-page latency histogram.
+    """
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    fetched = GaugedQueue("parse", queue_size)
+    parsed = GaugedQueue("write", queue_size)
+    fetch_stats = StageStats("fetch")
+    parse_stats = StageStats("parse")
+    write_stats = StageStats("write")
+    pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+
+    parsers_left = max(1, parse_workers)
+
+    async def parser():
+        nonlocal parsers_left
+        while True:
+            item = await fetched.get()
+            if item is _DONE:
+                break
+            target, html = item
+            start = time.monotonic()
+            if pool:
+                results = await loop.run_in_executor(pool, parse_page, target, html)
+            else:
+                results = parse_page(target, html)
+            elapsed = time.monotonic() - start
+            parse_stats.busy_seconds += elapsed
+            parse_stats.items += 1
+            if metrics:
+                metrics.add_time("stage.parse", elapsed)
+                metrics.observe("parse.latency", elapsed)
+            await parsed.put((target, results))
+        parsers_left -= 1
+        if not parsers_left:
+            await parsed.close()
+
+    async def writer():
+        while True:
+            item = await parsed.get()
+            if item is _DONE:
+                break
+            start = time.monotonic()
+            await loop.run_in_executor(None, write_page, *item)
+            elapsed = time.monotonic() - start
+            write_stats.busy_seconds += elapsed
+            write_stats.items += 1
+            if metrics:
+                metrics.add_time("stage.write", elapsed)
+                metrics.observe("write.latency", elapsed)
+
+    async def fetcher():
+        stats = await crawl(targets, lambda target, html: fetched.put((target, html)),
+                            concurrency=concurrency, host_rate=host_rate, scheduler=scheduler,
+                            metrics=metrics, **crawl_options)
+        for _ in range(parsers_left):
+            await fetched.close()
+        return stats
+
+    crawl_task = asyncio.create_task(fetcher())
+    tasks = [crawl_task, asyncio.create_task(writer())]
+    tasks += [asyncio.create_task(parser()) for _ in range(parsers_left)]
+    try:
+        # A stage that dies stops draining its queue, so the stages in front of
+        # it would block forever: fail the whole pipeline on the first error
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        crawl_stats = crawl_task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    fetch_stats.items = crawl_stats.pages_ok
+    fetch_stats.busy_seconds = crawl_stats.fetch_seconds
+    return PipelineReport(
+        crawl=crawl_stats,
+        stages=[fetch_stats, parse_stats, write_stats],
+        queues=[fetched, parsed],
+        elapsed=time.monotonic() - started,
+    )
@@ -0,0 +1,76 @@
+"""Per-host politeness scheduling shared by both scrapers.
+
+Only real network requests and browser navigations should go through the
+scheduler; parsing HTML that is already downloaded needs no throttling.
+"""
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Scheduler defaults
+DEFAULT_RATE = 4.0     # Sustained requests per second per host
+DEFAULT_BURST = 2      # Requests allowed back to back before throttling
+DEFAULT_JITTER = 0.25  # Random extra delay, as a fraction of 1 / rate
+
+class TokenBucket:
+    """Classic token bucket; reserve() hands out the delay before a request may start"""
+
+    def __init__(self, rate, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        # Borrow against the future: the caller waits until the token exists
+        return -self.tokens / self.rate
+
+class PolitenessScheduler:
+    """Hands out per-host start times for network and browser navigation events"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, jitter=DEFAULT_JITTER, host_rates=None):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.host_rates = host_rates or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.events = 0
+        self.waited = 0.0
+
+    def delay_for(self, url):
+        """Reserve a slot for `url` and return how long the caller must wait"""
+        host = urlsplit(url).netloc or url
+        rate = self.host_rates.get(host, self.rate)
+        if not rate or rate <= 0:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(rate, self.burst)
+            delay = bucket.reserve()
+            if delay and self.jitter:
+                delay += random.uniform(0, self.jitter) / rate
+            self.events += 1
+            self.waited += delay
+        return delay
+
+    def wait(self, url):
+        """Blocking variant for threads and Selenium drivers"""
+        delay = self.delay_for(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self, url):
+        """Asyncio variant for the crawl engine"""
+        delay = self.delay_for(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
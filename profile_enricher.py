@@ -0,0 +1,139 @@
+"""Lightweight profile enrichment over plain HTTP.
+
+Reads the PeoplePerHour profile headline (p.member-job) with requests and
+lxml instead of a browser navigation, reusing the cookies and user agent of
+a live browser session. Results are cached per profile link with a TTL in a
+small JSON file so re-runs skip profiles seen recently.
+"""
+import json
+import os
+import threading
+import time
+
+import requests
+
+from parsers import make_backend
+
+DESCRIPTION_SELECTOR = "p.member-job"
+DEFAULT_CACHE_PATH = ".profile_cache.json"
+DEFAULT_TTL = 7 * 24 * 3600
+REQUEST_TIMEOUT = 10
+
+class ProfileEnricher:
+    """Fetches and caches profile descriptions; returns None when the caller should fall back"""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, scheduler=None, timeout=REQUEST_TIMEOUT):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cookies = {}
+        self._headers = {}
+        self._session_version = 0
+        self._cache = self._load_cache()
+        self.cache_hits = 0
+        self.http_ok = 0
+        self.http_failed = 0
+
+    def _load_cache(self):
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        now = time.time()
+        with self._lock:
+            fresh = {link: entry for link, entry in self._cache.items() if now - entry[1] < self.ttl}
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fresh, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def sync_cookies(self, driver):
+        """Copy the browser's cookies and user agent so HTTP requests share its session"""
+        cookies = {cookie["name"]: cookie["value"] for cookie in driver.get_cookies()}
+        user_agent = driver.execute_script("return navigator.userAgent")
+        with self._lock:
+            if cookies == self._cookies and self._headers.get("User-Agent") == user_agent:
+                return
+            self._cookies = cookies
+            self._headers = {"User-Agent": user_agent, "Accept-Language": "en-US,en;q=0.9"}
+            self._session_version += 1
+
+    def _session(self):
+        """Per-thread session, refreshed whenever the browser cookies changed"""
+        session = getattr(self._local, "session", None)
+        if session is None or self._local.version != self._session_version:
+            with self._lock:
+                session = requests.Session()
+                session.headers.update(self._headers)
+                session.cookies.update(self._cookies)
+                self._local.session = session
+                self._local.version = self._session_version
+        return session
+
+    def _parser(self):
+        """Per-thread parser; compiled XPath evaluators are not shared between threads"""
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = self._local.parser = make_backend("lxml", [DESCRIPTION_SELECTOR])
+        return parser
+
+    def cached(self, profile_link):
+        with self._lock:
+            entry = self._cache.get(profile_link)
+        if entry and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def remember(self, profile_link, description):
+        with self._lock:
+            self._cache[profile_link] = [description, time.time()]
+
+    def parse_description(self, html):
+        """Headline of a profile page, or "" when the page has none"""
+        element = self._parser().parse(html).select_one(DESCRIPTION_SELECTOR)
+        return element.text.strip() if element is not None else ""
+
+    def fetch(self, profile_link):
+        """One HTTP GET + parse; None if the request fails or the page has no description"""
+        if self.scheduler:
+            self.scheduler.wait(profile_link)
+        try:
+            r = self._session().get(profile_link, timeout=self.timeout)
+            r.raise_for_status()
+        except requests.exceptions.RequestException:
+            self._count("http_failed")
+            return None
+        description = self.parse_description(r.text)
+        if not description:
+            self._count("http_failed")
+            return None
+        self._count("http_ok")
+        return description
+
+    def describe(self, profile_link):
+        """Cached or freshly fetched description, or None when only a browser can get it"""
+        description = self.cached(profile_link)
+        if description is not None:
+            self._count("cache_hits")
+            return description
+        description = self.fetch(profile_link)
+        if description is not None:
+            self.remember(profile_link, description)
+        return description
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def summary(self):
+        return f"{self.cache_hits} cached, {self.http_ok} fetched over HTTP, {self.http_failed} HTTP misses"
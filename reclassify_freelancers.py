@@ -0,0 +1,173 @@
+"""Recompute the category of rows already in freelancers.
+
+Run after the keyword lists in classifier.py change, or after the slug
+mapping in khamasat.card_category changes:
+
+    python reclassify_freelancers.py --dry-run
+    python reclassify_freelancers.py
+    python reclassify_freelancers.py --resume      # continue an interrupted run
+
+Rows are read in keyset-paginated chunks (id > last id ORDER BY id LIMIT n)
+through an unbuffered cursor, so memory stays bounded by the chunk size
+whatever the table size. PeoplePerHour rows are reclassified from their
+description with the keyword classifier, Khamsat rows have the slug their
+card linked to (source_slug) passed through card_category again. Khamsat
+rows stored before source_slug existed get it from LEGACY_KHAMSAT_LABELS
+first; rows whose label is not in that table are left alone. Changed rows
+are written back with one UPDATE ... WHERE id IN (...) per category per
+chunk, the days of those rows are refreshed in freelancer_stats_daily,
+and the last committed id is saved to a checkpoint file after every chunk.
+"""
+import argparse
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+from classifier import CategoryClassifier
+from db import DB_ERRORS, create_db_connection, run_in_transaction
+from khamasat import card_category
+from materialize_stats import refresh_rows
+from schema import SLUG_COLUMN, add_slug_column
+
+DEFAULT_CHUNK = 5000
+DEFAULT_CHECKPOINT = ".reclassify_checkpoint.json"
+SOURCES = ("khamsat", "peopleperhour")
+
+# Labels Khamsat rows were stored with before source_slug existed, i.e. the
+# title-cased slugs, and the slug each one came from. A label can't be turned
+# back into its slug in general (CATEGORY_LABELS, earlier remaps), so only
+# these are backfilled.
+LEGACY_KHAMSAT_LABELS = {
+    "Desktop App": "desktop-app",
+    "Web Development": "web-development",
+    "Mobile Apps": "mobile-apps",
+}
+
+def row_source(profile_link):
+    """Which scraper produced a row, from the host of its profile link"""
+    host = urlsplit(profile_link or "").netloc.lower()
+    for source in SOURCES:
+        if host == f"{source}.com" or host.endswith(f".{source}.com"):
+            return source
+    return None
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)["last_id"]
+    except (OSError, ValueError, KeyError):
+        return 0
+
+def save_checkpoint(path, last_id):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_id": last_id}, f)
+    os.replace(tmp_path, path)
+
+def reclassify_chunk(rows, classifier, sources):
+    """({new category: [ids]}, {backfilled slug: [ids]}) for the rows of one chunk"""
+    updates = {}
+    slugs = {}
+    descriptions = [(row_id, description, category) for row_id, link, description, category, _ in rows
+                    if "peopleperhour" in sources and row_source(link) == "peopleperhour"]
+    new_categories = classifier.classify_many([description or "" for _, description, _ in descriptions])
+    for (row_id, _, category), new_category in zip(descriptions, new_categories):
+        if new_category != category:
+            updates.setdefault(new_category, []).append(row_id)
+    if "khamsat" in sources:
+        for row_id, link, _, category, slug in rows:
+            if row_source(link) != "khamsat":
+                continue
+            if not slug:
+                slug = LEGACY_KHAMSAT_LABELS.get(category)
+                if not slug:
+                    continue
+                slugs.setdefault(slug, []).append(row_id)
+            new_category = card_category(slug)
+            if new_category != category:
+                updates.setdefault(new_category, []).append(row_id)
+    return updates, slugs
+
+def write_updates(connection, updates, slugs, table):
+    def update(cursor):
+        for category, ids in updates.items():
+            cursor.execute(
+                f"UPDATE {table} SET category = %s WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                (category, *ids)
+            )
+        for slug, ids in slugs.items():
+            cursor.execute(
+                f"UPDATE {table} SET {SLUG_COLUMN} = %s WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                (slug, *ids)
+            )
+    run_in_transaction(connection, update)
+
+def reclassify(sources=SOURCES, chunk=DEFAULT_CHUNK, start_id=0, checkpoint=DEFAULT_CHECKPOINT,
+               dry_run=False, table="freelancers"):
+    """Stream every row after `start_id`; returns (rows scanned, rows changed) or None on error"""
+    connection = create_db_connection()
+    if not connection:
+        return None
+    classifier = CategoryClassifier()
+    last_id = start_id
+    scanned = 0
+    changed = 0
+    started_at = time.monotonic()
+    try:
+        add_slug_column(connection, table)
+        cursor = connection.cursor(buffered=False)
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        max_id = cursor.fetchone()[0]
+        while True:
+            cursor.execute(f"""
+                SELECT id, profile_link, short_description, category, {SLUG_COLUMN} FROM {table}
+                WHERE id > %s ORDER BY id LIMIT %s
+            """, (last_id, chunk))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            updates, slugs = reclassify_chunk(rows, classifier, sources)
+            if (updates or slugs) and not dry_run:
+                write_updates(connection, updates, slugs, table)
+                refresh_rows(connection, [row_id for ids in updates.values() for row_id in ids], table)
+            last_id = rows[-1][0]
+            scanned += len(rows)
+            changed += sum(len(ids) for ids in updates.values())
+            if checkpoint and not dry_run:
+                save_checkpoint(checkpoint, last_id)
+            elapsed = time.monotonic() - started_at
+            print(f"  id {last_id}/{max_id}: {scanned} rows scanned, {changed} "
+                  f"{'would change' if dry_run else 'updated'} ({scanned / elapsed:.0f} rows/s)")
+        cursor.close()
+        if checkpoint and not dry_run and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        return scanned, changed
+    except DB_ERRORS as e:
+        connection.rollback()
+        print(f"Database error: {e} (resume from id {last_id} with --resume)")
+        return None
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute categories of existing freelancers")
+    parser.add_argument("--source", choices=("all",) + SOURCES, default="all", help="Only reclassify rows from this site")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="Rows read per keyset chunk")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would change")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File recording the last committed id")
+    parser.add_argument("--resume", action="store_true", help="Start after the id saved in the checkpoint file")
+    parser.add_argument("--start-id", type=int, default=0, help="Start after this id")
+    args = parser.parse_args()
+
+    start_id = load_checkpoint(args.checkpoint) if args.resume else args.start_id
+    if start_id:
+        print(f"Resuming after id {start_id}")
+    sources = SOURCES if args.source == "all" else (args.source,)
+    result = reclassify(sources, args.chunk, start_id, args.checkpoint, args.dry_run)
+    if result:
+        scanned, changed = result
+        print(f"\n✅ Reclassification completed: {changed} of {scanned} rows "
+              f"{'would change' if args.dry_run else 'updated'}")
+    else:
+        print("\n❌ Reclassification failed")
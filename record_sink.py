@@ -0,0 +1,167 @@
+"""Append-only record files written while scraping.
+
+Rows are streamed into `<directory>/<prefix>-<timestamp>-<n>.jsonl` as they
+are extracted, one JSON object per line keyed by FREELANCER_COLUMNS. The
+file being written carries a `.part` suffix and is renamed once it reaches
+`max_bytes` or the sink is closed, so load_records.py only ever picks up
+complete files. With pyarrow installed the same rows can be written as
+Parquet instead.
+"""
+import json
+import os
+import threading
+import time
+
+from db_writer import FREELANCER_COLUMNS
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("jsonl", "parquet")
+DEFAULT_EXPORT_DIR = "exports"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_ROW_GROUP = 10000
+PART_SUFFIX = ".part"
+NUMERIC_COLUMNS = {"rating": "float64", "price": "float64", "reviews": "int64"}
+
+class RotatingSink:
+    """Base class: numbering, rotation and the .part rename"""
+    extension = None
+
+    def __init__(self, directory=DEFAULT_EXPORT_DIR, prefix="freelancers", columns=FREELANCER_COLUMNS,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = tuple(columns)
+        self.max_bytes = max_bytes
+        self._stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._sequence = 0
+        self._path = None
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.files = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _next_path(self):
+        self._sequence += 1
+        name = f"{self.prefix}-{self._stamp}-{self._sequence:04d}.{self.extension}"
+        return os.path.join(self.directory, name)
+
+    def add(self, row):
+        """Append one row (a tuple in column order)"""
+        with self._lock:
+            if self._path is None:
+                self._path = self._next_path()
+                self._open(self._path + PART_SUFFIX)
+            self._write(row)
+            self.rows_written += 1
+            if self._size() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._close()
+        os.replace(self._path + PART_SUFFIX, self._path)
+        self.files.append(self._path)
+        self._path = None
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """Finish the current file; returns the complete files written by this sink"""
+        with self._lock:
+            if self._path is not None:
+                self._rotate()
+        return self.files
+
+    def summary(self):
+        return f"{self.rows_written} records in {len(self.files)} {self.extension} files under {self.directory}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class JsonlSink(RotatingSink):
+    """Line-buffered JSONL: every record reaches the OS as soon as it is added"""
+    extension = "jsonl"
+
+    def _open(self, path):
+        self._file = open(path, "w", encoding="utf-8", buffering=1)
+
+    def _write(self, row):
+        self._file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n")
+
+    def _size(self):
+        return self._file.tell()
+
+    def _close(self):
+        self._file.close()
+
+class ParquetSink(RotatingSink):
+    """Columnar output; rows are buffered into row groups of `row_group` records"""
+    extension = "parquet"
+
+    def __init__(self, *args, row_group=DEFAULT_ROW_GROUP, **kwargs):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        super().__init__(*args, **kwargs)
+        self.row_group = row_group
+        self._rows = []
+        self._schema = pyarrow.schema([
+            (column, getattr(pyarrow, NUMERIC_COLUMNS.get(column, "string"))()) for column in self.columns
+        ])
+
+    def _open(self, path):
+        self._file_path = path
+        self._writer = None
+
+    def _write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group:
+            self._write_group()
+
+    def _write_group(self):
+        if not self._rows:
+            return
+        table = pyarrow.Table.from_pylist([dict(zip(self.columns, row)) for row in self._rows],
+                                          schema=self._schema)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self._file_path, self._schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def _size(self):
+        return os.path.getsize(self._file_path) if self._writer is not None else 0
+
+    def _close(self):
+        self._write_group()
+        if self._writer is not None:
+            self._writer.close()
+
+SINKS = {"jsonl": JsonlSink, "parquet": ParquetSink}
+
+def make_sink(format="jsonl", directory=DEFAULT_EXPORT_DIR, prefix="freelancers", **options):
+    if format not in SINKS:
+        raise ValueError(f"Unknown export format {format!r}, expected one of {FORMATS}")
+    return SINKS[format](directory, prefix, **options)
+
+def read_records(path, columns=FREELANCER_COLUMNS):
+    """Yield the rows of a finished export file as tuples in `columns` order"""
+    if path.endswith(".parquet"):
+        if pyarrow is None:
+            raise RuntimeError("Reading Parquet files needs pyarrow (pip install pyarrow)")
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches():
+            for record in batch.to_pylist():
+                yield tuple(record.get(column) for column in columns)
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield tuple(record.get(column) for column in columns)
@@ -0,0 +1,318 @@
+"""Long-running refresh scheduler for both scrapers.
+
+    python refresh_scheduler.py                         # every Khamsat category, forever
+    python refresh_scheduler.py --peopleperhour         # plus the PeoplePerHour listing (needs a browser)
+    python refresh_scheduler.py --once                  # run every due job once and exit
+
+Every category is a job with its own refresh interval. After each run the
+churn rate (new + changed rows over the rows seen, from the incremental
+index) moves that interval: above --high-churn it is halved, below
+--low-churn it grows by BACKOFF_FACTOR, always within [--min-interval,
+--max-interval]. The churn is smoothed over runs so one odd run does not
+swing the interval, and a job's first run is not counted since every row
+it sees is new. Pages answered 304 Not Modified count as unchanged rows,
+and a run that measured nothing does not move the interval.
+
+A failed run leaves the interval alone and is retried after RETRY_DELAY,
+doubling per consecutive failure up to the job's interval. Job state is
+written to --state after every run, so a restarted scheduler continues
+with the intervals and due times it had learned.
+
+At most --max-in-flight jobs run at once, and the Khamsat jobs share one
+politeness scheduler, so adding categories does not raise the request rate
+against the site.
+"""
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, fields
+
+import khamasat
+import scrap
+from crawler import DEFAULT_HOST_RATE
+from db import utc_now
+from http_cache import DEFAULT_CACHE_DIR
+from metrics import DEFAULT_REPORT_DIR, Metrics
+from politeness import PolitenessScheduler
+
+DEFAULT_STATE_PATH = ".scheduler_state.json"
+DEFAULT_MAX_IN_FLIGHT = 2
+DEFAULT_PAGES = "1-5"
+
+# Seconds
+DEFAULT_INTERVAL = 6 * 3600
+DEFAULT_MIN_INTERVAL = 30 * 60
+DEFAULT_MAX_INTERVAL = 7 * 24 * 3600
+RETRY_DELAY = 60
+POLL_SECONDS = 30
+
+# Share of new or changed rows per run
+DEFAULT_HIGH_CHURN = 0.2
+DEFAULT_LOW_CHURN = 0.02
+BACKOFF_FACTOR = 1.5
+CHURN_SMOOTHING = 0.5  # Weight of the latest run in the smoothed churn
+
+@dataclass
+class JobState:
+    """What the scheduler remembers about one job between runs and restarts"""
+    name: str
+    interval: float = DEFAULT_INTERVAL
+    next_run: float = 0.0
+    last_run: str = None
+    last_churn: float = None
+    churn: float = None
+    runs: int = 0
+    failures: int = 0
+
+def next_interval(interval, churn, low=DEFAULT_LOW_CHURN, high=DEFAULT_HIGH_CHURN,
+                  min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL):
+    """Halve the interval for busy categories, back off for static ones"""
+    if churn is None:
+        return interval
+    if churn > high:
+        interval /= 2
+    elif churn < low:
+        interval *= BACKOFF_FACTOR
+    return min(max_interval, max(min_interval, interval))
+
+def churn_rate(metrics):
+    """New + changed rows over all rows seen in a run, None if nothing was seen.
+
+    Pages answered 304 Not Modified are never classified; they count as
+    unchanged, with as many rows as the pages that were fetched.
+    """
+    counters = metrics.counters
+    changed = counters.get("rows.new", 0) + counters.get("rows.changed", 0)
+    seen = changed + counters.get("rows.unchanged", 0)
+    not_modified = counters.get("fetch.not_modified", 0)
+    if not_modified:
+        fetched = counters.get("fetch.ok", 0)
+        if not fetched:
+            return 0.0
+        seen += not_modified * seen / fetched
+    return changed / seen if seen else None
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    known = {f.name for f in fields(JobState)}
+    return {name: JobState(**{k: v for k, v in state.items() if k in known}) for name, state in saved.items()}
+
+def save_state(path, states):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({name: asdict(state) for name, state in states.items()}, f, indent=2)
+    os.replace(tmp_path, path)
+
+class Job:
+    """A named refresh whose run(metrics) returns True on success"""
+
+    def __init__(self, name, run):
+        self.name = name
+        self.run = run
+
+def khamsat_job(slug, pages, scheduler, cache_dir=DEFAULT_CACHE_DIR, report_dir=None, **options):
+    """One Khamsat category, crawled incrementally so churn can be measured"""
+    def run(metrics):
+        return khamasat.scrape_and_import_khamsat(
+            categories=[slug],
+            pages=pages,
+            incremental=True,
+            scheduler=scheduler,
+            # One cache per category: concurrent runs must not rewrite each other's index
+            cache_dir=os.path.join(cache_dir, slug) if cache_dir else None,
+            report_path=_report_path(report_dir, f"khamsat-{slug}"),
+            metrics=metrics,
+            **options
+        )
+    return Job(f"khamsat:{slug}", run)
+
+def peopleperhour_job(pages, report_dir=None, **options):
+    def run(metrics):
+        return scrap.scrape_and_import(
+            pages=pages,
+            track_changes=True,
+            report_path=_report_path(report_dir, "peopleperhour"),
+            metrics=metrics,
+            **options
+        )
+    return Job(f"peopleperhour:{scrap.LISTING_PATH.rsplit('/', 1)[-1]}", run)
+
+def _report_path(directory, source):
+    if not directory:
+        return None
+    return os.path.join(directory, f"{source}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+class RefreshScheduler:
+    """Runs due jobs on a bounded thread pool and adapts each job's interval"""
+
+    def __init__(self, jobs, state_path=DEFAULT_STATE_PATH, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 interval=DEFAULT_INTERVAL, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 low_churn=DEFAULT_LOW_CHURN, high_churn=DEFAULT_HIGH_CHURN):
+        self.jobs = {job.name: job for job in jobs}
+        self.state_path = state_path
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.low_churn = low_churn
+        self.high_churn = high_churn
+        self.stopping = threading.Event()
+        saved = load_state(state_path) if state_path else {}
+        self.states = {name: saved.get(name) or JobState(name, interval=interval) for name in self.jobs}
+
+    def stop(self, *args):
+        if not self.stopping.is_set():
+            print("\n🛑 Stopping after the jobs in flight")
+        self.stopping.set()
+
+    def save(self):
+        if self.state_path:
+            save_state(self.state_path, self.states)
+
+    def due(self, now, running):
+        ready = [state for name, state in self.states.items() if name not in running and state.next_run <= now]
+        return sorted(ready, key=lambda state: state.next_run)
+
+    def _run(self, name):
+        """Runs in a worker thread; never raises, so one job cannot take the scheduler down"""
+        metrics = Metrics()
+        started = time.monotonic()
+        try:
+            ok = bool(self.jobs[name].run(metrics))
+        except Exception as e:
+            print(f"❌ {name} crashed: {e}")
+            ok = False
+        return ok, churn_rate(metrics), time.monotonic() - started
+
+    def finish(self, name, ok, churn, elapsed):
+        """Record one run and work out when the job is due again"""
+        state = self.states[name]
+        state.last_run = utc_now()
+        now = time.time()
+        if not ok:
+            state.failures += 1
+            delay = min(state.interval, RETRY_DELAY * 2 ** (state.failures - 1))
+            state.next_run = now + delay
+            print(f"⚠️ {name} failed ({state.failures} in a row), retrying in {delay:.0f}s")
+            return
+        state.runs += 1
+        state.failures = 0
+        state.last_churn = churn
+        # Everything is new on a job's first run, so that one only sets the baseline
+        # and a run that measured nothing leaves the interval where it was
+        if churn is not None and state.runs > 1:
+            state.churn = churn if state.churn is None else (
+                CHURN_SMOOTHING * churn + (1 - CHURN_SMOOTHING) * state.churn)
+            state.interval = next_interval(state.interval, state.churn, self.low_churn, self.high_churn,
+                                           self.min_interval, self.max_interval)
+        state.next_run = now + state.interval
+        churn_text = f"{churn:.1%}" if churn is not None else "n/a"
+        print(f"✅ {name} done in {elapsed:.0f}s, churn {churn_text}, "
+              f"next run in {state.interval / 3600:.1f}h")
+
+    def run(self, once=False):
+        """Loop until stopped, or with `once` until every job due at start has run"""
+        running = {}
+        eligible = set(self.jobs)
+        if once:
+            eligible = {state.name for state in self.due(time.time(), running)}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="refresh") as executor:
+            while running or (eligible and not self.stopping.is_set()):
+                if not self.stopping.is_set():
+                    for state in self.due(time.time(), running):
+                        if len(running) >= self.max_in_flight:
+                            break
+                        if state.name in eligible:
+                            print(f"\n▶ {state.name} (interval {state.interval / 3600:.1f}h) at {utc_now()} UTC")
+                            running[state.name] = executor.submit(self._run, state.name)
+                timeout = POLL_SECONDS
+                if len(running) < self.max_in_flight:
+                    upcoming = [self.states[name].next_run for name in eligible if name not in running]
+                    if upcoming:
+                        timeout = min(timeout, max(0.0, min(upcoming) - time.time()))
+                if not running:
+                    self.stopping.wait(timeout)
+                    continue
+                done, _ = wait(running.values(), timeout=timeout, return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future in done:
+                        del running[name]
+                        self.finish(name, *future.result())
+                        if once:
+                            eligible.discard(name)
+                        # Saved after every run, so a restart keeps everything learned so far
+                        self.save()
+        self.save()
+
+    def summary(self):
+        lines = []
+        for state in self.states.values():
+            due = max(0.0, state.next_run - time.time())
+            churn = f"{state.churn:.1%}" if state.churn is not None else "n/a"
+            lines.append(f"  {state.name:<34} every {state.interval / 3600:5.1f}h  churn {churn:>6}  "
+                         f"due in {due / 3600:5.1f}h  {state.runs} runs, {state.failures} failing")
+        return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh every category on its own adaptive schedule")
+    parser.add_argument("--categories", default=",".join(khamasat.PROGRAMMING_CATEGORIES),
+                        help="Comma separated Khamsat category slugs")
+    parser.add_argument("--pages", default=DEFAULT_PAGES, help='Khamsat pages per run, e.g. "1-5"')
+    parser.add_argument("--base-url", default=khamasat.BASE_URL)
+    parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE,
+                        help="Requests per second against Khamsat, shared by all categories")
+    parser.add_argument("--parse-workers", type=int, default=khamasat.DEFAULT_PARSE_WORKERS)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--peopleperhour", action="store_true", help="Also refresh the PeoplePerHour listing")
+    parser.add_argument("--pph-pages", default="1-4", help="PeoplePerHour listing pages per run")
+    parser.add_argument("--pph-base-url", default=scrap.BASE_URL)
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Jobs allowed to run at the same time")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL / 3600,
+                        help="Starting interval for new jobs, in hours")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL / 3600, help="Hours")
+    parser.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL / 3600, help="Hours")
+    parser.add_argument("--low-churn", type=float, default=DEFAULT_LOW_CHURN,
+                        help="Back off when fewer than this share of rows changed")
+    parser.add_argument("--high-churn", type=float, default=DEFAULT_HIGH_CHURN,
+                        help="Refresh twice as often when more than this share of rows changed")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Where job state is kept across restarts")
+    parser.add_argument("--report-dir", nargs="?", const=DEFAULT_REPORT_DIR,
+                        help=f"Write a run report per job run (default {DEFAULT_REPORT_DIR}/)")
+    parser.add_argument("--once", action="store_true", help="Run every due job once and exit")
+    args = parser.parse_args()
+
+    politeness = PolitenessScheduler(rate=args.host_rate)
+    jobs = [
+        khamsat_job(slug, khamasat.parse_pages(args.pages), politeness, args.cache_dir, args.report_dir,
+                    base_url=args.base_url, parse_workers=args.parse_workers)
+        for slug in (c.strip() for c in args.categories.split(",")) if slug
+    ]
+    if args.peopleperhour:
+        jobs.append(peopleperhour_job(khamasat.parse_pages(args.pph_pages), args.report_dir,
+                                      base_url=args.pph_base_url))
+
+    scheduler = RefreshScheduler(
+        jobs,
+        state_path=args.state,
+        max_in_flight=args.max_in_flight,
+        interval=args.interval * 3600,
+        min_interval=args.min_interval * 3600,
+        max_interval=args.max_interval * 3600,
+        low_churn=args.low_churn,
+        high_churn=args.high_churn,
+    )
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    print(f"=== Refresh scheduler: {len(jobs)} jobs, at most {scheduler.max_in_flight} in flight ===")
+    print(scheduler.summary())
+    scheduler.run(once=args.once)
+    print("\nScheduler state:")
+    print(scheduler.summary())
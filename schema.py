@@ -0,0 +1,357 @@
+"""Schema helpers for the natural key used by the upsert path."""
+import hashlib
+import re
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+from db import SQLITE, dialect, run_in_transaction
+
+KEY_COLUMN = "source_key"
+SLUG_COLUMN = "source_slug"
+METADATA_COUNT_COLUMNS = ("new_count", "changed_count")
+METADATA_REPORT_COLUMN = "run_report"
+KEY_INDEX = "uq_freelancers_source_key"
+BACKFILL_CHUNK = 1000
+STATS_TABLE = "freelancer_stats_daily"
+CREATED_AT_INDEX = "ix_freelancers_created_at"
+ASSET_TABLE = "image_assets"
+ASSET_URL_INDEX = "ix_image_assets_normalized_url"
+SERVICE_KEY_PREFIX = "khamsat:service:"
+LEGACY_KEY_PREFIX = "khamsat:legacy:"
+KHAMSAT_KEY_HOST = "https://khamsat.com/"
+# Khamsat service images are stored under the service id
+SERVICE_IMAGE_RE = re.compile(r'/services/(\d+)\b')
+
+def natural_key(profile_link):
+    """Normalize a profile link into the stable key stored in freelancers.source_key.
+
+    Scheme and host are lowercased, "www." is dropped, the path is
+    percent-decoded (Khamsat links arrive both encoded and decoded) and the
+    query, fragment and trailing slash are removed.
+    """
+    if not profile_link:
+        return None
+    parts = urlsplit(profile_link.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = unquote(parts.path).rstrip("/")
+    return urlunsplit(("https", host, path, "", ""))[:255]
+
+def legacy_service_key(profile_link, short_description):
+    """source_key of a Khamsat service whose id is unknown: the seller plus the service title"""
+    seller = natural_key(profile_link) or ""
+    title = (short_description or "").strip()
+    return LEGACY_KEY_PREFIX + hashlib.sha1(f"{seller}\n{title}".encode("utf-8")).hexdigest()
+
+def service_key(service_id, profile_link, short_description=""):
+    """source_key of a Khamsat service card.
+
+    One seller offers many services, so cards are keyed on the service id;
+    cards without one, like the Khamsat rows stored before the id was
+    used, fall back to legacy_service_key.
+    """
+    if service_id:
+        return f"{SERVICE_KEY_PREFIX}{service_id}"
+    return legacy_service_key(profile_link, short_description)
+
+def stored_service_key(profile_link, profile_image, short_description):
+    """Best source_key for a stored Khamsat row: the service id from its image URL, else seller and title"""
+    match = SERVICE_IMAGE_RE.search(profile_image or "")
+    return service_key(match.group(1) if match else None, profile_link, short_description)
+
+def row_key(profile_link, profile_image, short_description):
+    """source_key for a stored row that has none: per service for Khamsat, per profile otherwise"""
+    key = natural_key(profile_link)
+    if key and key.startswith(KHAMSAT_KEY_HOST):
+        return stored_service_key(profile_link, profile_image, short_description)
+    return key
+
+def _column_exists(connection, cursor, table, column):
+    if dialect(connection) == SQLITE:
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def _index_exists(connection, cursor, table, index):
+    if dialect(connection) == SQLITE:
+        cursor.execute(f"PRAGMA index_list({table})")
+        return any(row[1] == index for row in cursor.fetchall())
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+def _add_column(connection, table, column, definition):
+    cursor = connection.cursor()
+    try:
+        if _column_exists(connection, cursor, table, column):
+            return False
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        connection.commit()
+        return True
+    finally:
+        cursor.close()
+
+def add_key_column(connection, table="freelancers"):
+    """Add the nullable source_key column if it is missing"""
+    return _add_column(connection, table, KEY_COLUMN, "VARCHAR(255) NULL")
+
+def add_slug_column(connection, table="freelancers"):
+    """Add the nullable source_slug column (the category slug a Khamsat card linked to) if it is missing"""
+    return _add_column(connection, table, SLUG_COLUMN, "VARCHAR(100) NULL")
+
+def backfill_keys(connection, table="freelancers"):
+    """Compute source_key for rows that predate the column; returns rows updated"""
+    updated = 0
+    last_id = 0
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT id, profile_link, profile_image, short_description FROM {table}
+                WHERE {KEY_COLUMN} IS NULL AND id > %s
+                ORDER BY id LIMIT %s
+            """, (last_id, BACKFILL_CHUNK))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            cursor.executemany(
+                f"UPDATE {table} SET {KEY_COLUMN} = %s WHERE id = %s",
+                [(row_key(link, image, description) or f"id:{row_id}", row_id)
+                 for row_id, link, image, description in rows]
+            )
+            connection.commit()
+            updated += len(rows)
+    finally:
+        cursor.close()
+    return updated
+
+def rekey_seller_rows(connection, table="freelancers"):
+    """Re-key Khamsat rows that were keyed on their seller's profile link; returns rows updated.
+
+    Keying on the seller collapsed all services of a seller into one key,
+    so these rows get their stored_service_key instead.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT id, profile_link, profile_image, short_description FROM {table}
+            WHERE {KEY_COLUMN} LIKE %s
+        """, (KHAMSAT_KEY_HOST + "%",))
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        updates = [(stored_service_key(link, image, description), row_id)
+                   for row_id, link, image, description in rows]
+        # A service stored again since then already has the new key; that newer row wins
+        new_keys = [key for key, _ in updates]
+        taken = set()
+        for start in range(0, len(new_keys), BACKFILL_CHUNK):
+            chunk = new_keys[start:start + BACKFILL_CHUNK]
+            cursor.execute(f"""
+                SELECT {KEY_COLUMN} FROM {table} WHERE {KEY_COLUMN} IN ({', '.join(['%s'] * len(chunk))})
+            """, chunk)
+            taken.update(key for (key,) in cursor.fetchall())
+        cursor.executemany(f"DELETE FROM {table} WHERE id = %s",
+                           [(row_id,) for key, row_id in updates if key in taken])
+        cursor.executemany(f"UPDATE {table} SET {KEY_COLUMN} = %s WHERE id = %s",
+                           [(key, row_id) for key, row_id in updates if key not in taken])
+        connection.commit()
+        return len(rows)
+    finally:
+        cursor.close()
+
+def has_legacy_rows(connection, table="freelancers"):
+    """Whether any Khamsat row is still keyed by legacy_service_key"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT 1 FROM {table} WHERE {KEY_COLUMN} LIKE %s LIMIT 1", (LEGACY_KEY_PREFIX + "%",))
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+def adopt_legacy_rows(connection, keys, table="freelancers"):
+    """Move legacy-keyed rows onto their service keys ({legacy key: service key}); returns rows handled.
+
+    A legacy row is re-keyed, keeping its id and created_at, so the next
+    upsert of the service updates it; if the service already has its own
+    row, the legacy one is deleted.
+    """
+    if not keys:
+        return 0
+    cursor = connection.cursor()
+    try:
+        legacy = list(keys)
+        cursor.execute(f"""
+            SELECT {KEY_COLUMN} FROM {table} WHERE {KEY_COLUMN} IN ({', '.join(['%s'] * len(legacy))})
+        """, legacy)
+        found = [key for (key,) in cursor.fetchall()]
+        if not found:
+            return 0
+        services = [keys[key] for key in found]
+        cursor.execute(f"""
+            SELECT {KEY_COLUMN} FROM {table} WHERE {KEY_COLUMN} IN ({', '.join(['%s'] * len(services))})
+        """, services)
+        existing = {key for (key,) in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+    def adopt(cursor):
+        for key in found:
+            if keys[key] in existing:
+                cursor.execute(f"DELETE FROM {table} WHERE {KEY_COLUMN} = %s", (key,))
+            else:
+                cursor.execute(f"UPDATE {table} SET {KEY_COLUMN} = %s WHERE {KEY_COLUMN} = %s", (keys[key], key))
+    run_in_transaction(connection, adopt)
+    return len(found)
+
+def count_duplicates(connection, table="freelancers"):
+    """Number of rows that would be removed by delete_duplicates()"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT COALESCE(SUM(n - 1), 0) FROM (
+                SELECT COUNT(*) AS n FROM {table}
+                GROUP BY {KEY_COLUMN} HAVING COUNT(*) > 1
+            ) dups
+        """)
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+def delete_duplicates(connection, table="freelancers"):
+    """Keep the newest row (highest id) per source_key and delete the rest"""
+    cursor = connection.cursor()
+    try:
+        if dialect(connection) == SQLITE:
+            cursor.execute(f"""
+                DELETE FROM {table} WHERE id NOT IN (
+                    SELECT MAX(id) FROM {table} GROUP BY {KEY_COLUMN}
+                )
+            """)
+            deleted = cursor.rowcount
+            connection.commit()
+            return deleted
+        cursor.execute(f"""
+            DELETE f FROM {table} f
+            JOIN (
+                SELECT {KEY_COLUMN}, MAX(id) AS keep_id FROM {table}
+                GROUP BY {KEY_COLUMN} HAVING COUNT(*) > 1
+            ) dups ON f.{KEY_COLUMN} = dups.{KEY_COLUMN} AND f.id < dups.keep_id
+        """)
+        deleted = cursor.rowcount
+        connection.commit()
+        return deleted
+    finally:
+        cursor.close()
+
+def add_unique_index(connection, table="freelancers"):
+    """Create the unique index on source_key; fails while duplicates remain"""
+    cursor = connection.cursor()
+    try:
+        if _index_exists(connection, cursor, table, KEY_INDEX):
+            return False
+        cursor.execute(f"CREATE UNIQUE INDEX {KEY_INDEX} ON {table} ({KEY_COLUMN})")
+        connection.commit()
+        return True
+    finally:
+        cursor.close()
+
+def ensure_upsert_schema(connection, table="freelancers"):
+    """Make sure source_key exists, is filled in and is unique, and that source_slug exists.
+
+    Raises RuntimeError while existing duplicates block the unique index;
+    run compact_freelancers.py once to remove them.
+    """
+    add_key_column(connection, table)
+    add_slug_column(connection, table)
+    backfill_keys(connection, table)
+    rekey_seller_rows(connection, table)
+    cursor = connection.cursor()
+    try:
+        if _index_exists(connection, cursor, table, KEY_INDEX):
+            return
+    finally:
+        cursor.close()
+    duplicates = count_duplicates(connection, table)
+    if duplicates:
+        raise RuntimeError(f"{table} has {duplicates} duplicate rows; run compact_freelancers.py first")
+    add_unique_index(connection, table)
+
+def ensure_metadata_counts(connection, table="metadata"):
+    """Add the new_count / changed_count columns recorded next to record_count"""
+    cursor = connection.cursor()
+    try:
+        for column in METADATA_COUNT_COLUMNS:
+            if not _column_exists(connection, cursor, table, column):
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} INT NULL")
+        connection.commit()
+    finally:
+        cursor.close()
+
+def ensure_metadata_report(connection, table="metadata"):
+    """Add the run_report column holding the JSON run report of an import"""
+    cursor = connection.cursor()
+    try:
+        if not _column_exists(connection, cursor, table, METADATA_REPORT_COLUMN):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {METADATA_REPORT_COLUMN} TEXT NULL")
+        connection.commit()
+    finally:
+        cursor.close()
+
+def ensure_stats_schema(connection, table="freelancers"):
+    """Create the materialized statistics table and the created_at index it is refreshed through"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+                stat_date DATE NOT NULL,
+                category VARCHAR(255) NOT NULL,
+                price_range VARCHAR(20) NOT NULL,
+                rating_range VARCHAR(20) NOT NULL,
+                freelancer_count INT NOT NULL,
+                rated_count INT NOT NULL,
+                rating_sum DOUBLE NOT NULL,
+                priced_count INT NOT NULL,
+                price_sum DOUBLE NOT NULL,
+                reviews_sum BIGINT NOT NULL,
+                min_price DOUBLE NULL,
+                max_price DOUBLE NULL,
+                refreshed_at DATETIME NOT NULL,
+                PRIMARY KEY (stat_date, category, price_range, rating_range)
+            )
+        """)
+        if not _index_exists(connection, cursor, table, CREATED_AT_INDEX):
+            cursor.execute(f"CREATE INDEX {CREATED_AT_INDEX} ON {table} (created_at)")
+        connection.commit()
+    finally:
+        cursor.close()
+
+def ensure_asset_schema(connection):
+    """Create the table mapping stored profile_image URLs to their local copies"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ASSET_TABLE} (
+                source_url VARCHAR(512) NOT NULL PRIMARY KEY,
+                normalized_url VARCHAR(512) NOT NULL,
+                content_hash CHAR(64) NOT NULL,
+                local_path VARCHAR(255) NOT NULL,
+                thumb_path VARCHAR(255) NULL,
+                bytes INT NOT NULL,
+                etag VARCHAR(255) NULL,
+                last_modified VARCHAR(64) NULL,
+                fetched_at DATETIME NOT NULL
+            )
+        """)
+        if not _index_exists(connection, cursor, ASSET_TABLE, ASSET_URL_INDEX):
+            cursor.execute(f"CREATE INDEX {ASSET_URL_INDEX} ON {ASSET_TABLE} (normalized_url)")
+        connection.commit()
+    finally:
+        cursor.close()
@@ -1,215 +1,381 @@
-from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import mysql.connector
+import argparse
+import threading
 import time
-import random
 from datetime import datetime
+from browser_pool import BROWSERS, DEFAULT_NAV_RATE, DEFAULT_WORKERS, BrowserConfig, BrowserPool, make_driver
+from classifier import CATEGORY_KEYWORDS, CategoryClassifier
+from db import create_db_connection, utc_now
+from db_writer import BatchedWriter, finish_import
+from image_assets import DEFAULT_ASSET_DIR
+from incremental import KnownServices
+from metrics import Metrics, default_report_path
+from politeness import PolitenessScheduler
+from record_sink import DEFAULT_EXPORT_DIR, FORMATS, make_sink
+from profile_enricher import DEFAULT_CACHE_PATH, DEFAULT_TTL, DESCRIPTION_SELECTOR, ProfileEnricher
+from schema import ensure_metadata_report, ensure_upsert_schema, natural_key
 
-# Update with your current timestamp and username
-CURRENT_TIMESTAMP = "2025-05-28 10:13:59"
+# Update with your username
 CURRENT_USER = "souhail4real"
 
-# Database configuration
-DB_CONFIG = {
-    "host": "localhost",
-    "database": "freelancima",
-    "user": "root",
-    "password": ""
-}
-
-# Your existing categories dictionary remains the same
-categories = {
-    'web-development': ['web', 'developer', 'development', 'javascript', 'react', 'vue', 'angular', 'node', 'php', 'laravel', 'html', 'css', 'bootstrap', 'tailwind', 'wordpress', 'shopify', 'frontend', 'backend', 'full stack'],
-    'mobile-development': ['mobile', 'android', 'ios', 'flutter', 'react native', 'kotlin', 'swift', 'dart', 'xamarin', 'ionic', 'app development', 'pwa', 'mobile app'],
-    'data-science-ml': ['data', 'machine learning', 'artificial intelligence', 'ai', 'ml', 'python', 'pandas', 'tensorflow', 'pytorch', 'scikit', 'data analysis', 'data scientist', 'big data', 'nlp', 'deep learning', 'neural network'],
-    'cybersecurity': ['security', 'cyber', 'ethical hacking', 'penetration testing', 'pen test', 'infosec', 'firewall', 'cryptography', 'encryption', 'vulnerability', 'security audit', 'siem', 'compliance', 'gdpr'],
-    'cloud-devops': ['cloud', 'aws', 'azure', 'gcp', 'google cloud', 'devops', 'docker', 'kubernetes', 'jenkins', 'ci/cd', 'terraform', 'ansible', 'infrastructure', 'iaas', 'paas', 'saas', 'microservices', 'serverless']
-}
-
-def create_db_connection():
-    """Create and return a database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG, autocommit=False)
-        print("✅ Database connection established")
-        return connection
-    except mysql.connector.Error as err:
-        print(f"❌ Database connection failed: {err}")
-        return None
-
-def setup_edge_driver():
-    """Setup and return Edge WebDriver with proper options"""
-    options = webdriver.EdgeOptions()
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--disable-notifications')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    options.add_experimental_option('useAutomationExtension', False)
+# Listing to crawl
+BASE_URL = "https://www.peopleperhour.com"
+LISTING_PATH = "services/technology-programming/mobile-app-development"
+DEFAULT_PAGES = range(1, 5)
+CARDS_PER_PAGE = 15
+DEFAULT_DESCRIPTION = "Professional Freelancer"
+
+# Listing card selectors (the class suffixes are generated by the site's CSS modules)
+CARD_LINK_SELECTOR = "a.card__user-link⤍HourlieTileMeta⤚F1h11"
+CARD_USERNAME_SELECTOR = "span.card__username⤍HourlieTileMeta⤚1hJNR"
+CARD_RATING_SELECTOR = "span.card__freelancer-ratings⤍HourlieTileMeta⤚1zn5P"
+CARD_REVIEWS_SELECTOR = "span.card__freelancer-reviews⤍HourlieTileMeta⤚HCTu6"
+
+# Task kinds for the browser pool
+LISTING_TASK = "listing"
+PROFILE_TASK = "profile"
+
+# Browser navigations (listing pages and profile tabs) are spaced per host at
+# BrowserConfig.nav_rate, across all workers
+NAVIGATION_BURST = 2
+NAVIGATION_JITTER = 0.5
+
+# Plain HTTP profile requests are far cheaper for the site than a page load
+PROFILE_FETCH_RATE = 2.0
+profile_politeness = PolitenessScheduler(rate=PROFILE_FETCH_RATE, burst=NAVIGATION_BURST)
+
+# Keyword lists live in classifier.py; scrap.categories stays the public name
+categories = CATEGORY_KEYWORDS
+classifier = CategoryClassifier(categories)
+
+def extract_listing_cards(driver, url, scheduler, metrics=None):
+    """Open one listing page and read the card fields available without visiting profiles"""
+    scheduler.wait(url)
+    driver.get(url)
     
-    service = Service(r"C:\Users\SOUHAIL\Downloads\edgedriver_win64\msedgedriver.exe")
-    driver = webdriver.Edge(service=service, options=options)
+    # Wait for freelancer elements
+    freelancer_elements = WebDriverWait(driver, 15).until(
+        EC.presence_of_all_elements_located(
+            (By.CSS_SELECTOR, CARD_LINK_SELECTOR)
+        )
+    )
     
-    # Add undetectable properties
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    cards = []
+    for freelancer in freelancer_elements[:CARDS_PER_PAGE]:
+        try:
+            cards.append({
+                'username': freelancer.find_element(
+                    By.CSS_SELECTOR, CARD_USERNAME_SELECTOR
+                ).text.strip(),
+                'profile_link': freelancer.get_attribute("href"),
+                'profile_image': freelancer.find_element(By.CSS_SELECTOR, "img").get_attribute("src"),
+                'rating': freelancer.find_element(
+                    By.CSS_SELECTOR, CARD_RATING_SELECTOR
+                ).text.split()[0],
+                'reviews': freelancer.find_element(
+                    By.CSS_SELECTOR, CARD_REVIEWS_SELECTOR
+                ).text.strip().replace("(", "").replace(")", "")
+            })
+        except Exception as e:
+            if metrics:
+                metrics.count("cards.failed")
+            print(f"⚠️ Error reading freelancer card: {str(e)}")
+    return cards
+
+def fetch_profile_description(driver, profile_link, scheduler):
+    """Navigate the worker's browser to a profile and read its headline"""
+    scheduler.wait(profile_link)
+    driver.get(profile_link)
+    try:
+        return WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, DESCRIPTION_SELECTOR))
+        ).text.strip()
+    except TimeoutException:
+        return DEFAULT_DESCRIPTION
+
+def build_row(card, description, metrics=None):
+    """Turn a listing card plus its profile description into a freelancers row"""
+    rating = card['rating']
+    reviews = card['reviews']
     
-    return driver
+    # Calculate price and category
+    price = str(max(15, min(50, int(25 * (1 + float(rating) / 10 + 
+             (int(reviews) if reviews.isdigit() else 0) / 200)))))
+    start = time.perf_counter()
+    category = determine_category(description)
+    if metrics:
+        metrics.add_time("classify", time.perf_counter() - start)
+        metrics.count(f"category.{category}")
+    
+    return (
+        card['username'], card['profile_link'], card['profile_image'], float(rating),
+        int(reviews) if reviews.isdigit() else 0,
+        description, float(price), category, utc_now(),
+        natural_key(card['profile_link']), None
+    )
+
+def listing_url(page, base_url=BASE_URL):
+    return f"{base_url.rstrip('/')}/{LISTING_PATH}?page={page}"
+
+def run_fields(writer, success, enricher=None, pool=None):
+    """Run-level fields stored next to the metrics in the run report"""
+    fields = {"source": "peopleperhour", "success": success}
+    if writer:
+        fields["rows_written"] = writer.rows_written
+        fields["flushes"] = writer.flushes
+    if enricher:
+        fields["profiles"] = {"cached": enricher.cache_hits, "http_ok": enricher.http_ok,
+                              "http_failed": enricher.http_failed}
+    if pool:
+        fields["browser_pool"] = {"workers": pool.workers, "started": pool.started, "done": pool.done,
+                                  "failed": pool.failed, "unrun": pool.unrun}
+    return fields
+
+def scrape_and_import(pages=DEFAULT_PAGES, workers=DEFAULT_WORKERS, browser_config=None, base_url=BASE_URL,
+                      http_profiles=True, profile_cache=DEFAULT_CACHE_PATH, profile_ttl=DEFAULT_TTL,
+                      export_dir=None, export_format="jsonl", use_db=True,
+                      report_path=None, metadata_report=False, track_changes=False, metrics=None, assets_dir=None,
+                      driver_factory=make_driver):
+    """Scrape listing pages and profiles on a pool of browsers and import the results.
+
+    Listing pages and profile pages are separate task types on one work
+    queue: each listing task queues a profile task per card, and any free
+    worker picks those up, so profile visits no longer serialize the crawl.
 
-def scrape_and_import():
-    """Main function to scrape data and import directly to database without verification"""
+    With `http_profiles` the description is read over plain HTTP using the
+    browser's cookies (and cached per profile link for `profile_ttl`
+    seconds); the worker's browser only navigates to the profile when that
+    lightweight fetch fails.
+
+    Browser navigations of all workers share one per-host limit of
+    `browser_config.nav_rate` per second, so more workers only help while
+    that rate is not the bottleneck (see browser_pool.DEFAULT_NAV_RATE).
+
+    With `export_dir` every row is also appended to rotated export files
+    before it reaches the database; `use_db=False` only writes those files.
+
+    Listing, profile, classification and DB timings go into `metrics` (a
+    new metrics.Metrics by default), written as a JSON run report to
+    `report_path`; `metadata_report=True` also stores it in the metadata row.
+
+    With `track_changes` every row is compared with the stored one and
+    counted as rows.new / rows.changed / rows.unchanged; all rows are still
+    written, since the profile has been visited anyway.
+
+    With `assets_dir` the profile images of the rows written are stored
+    locally afterwards (see image_assets.py).
+
+    `driver_factory(browser_config)` creates each worker's WebDriver
+    (browser_pool.make_driver by default).
+    """
     connection = None
-    driver = None
     cursor = None
+    enricher = None
+    sink = None
+    writer = None
+    pool = None
+    known = None
+    metrics = metrics or Metrics()
+    success = False
+    browser_config = browser_config or BrowserConfig()
+    navigation = PolitenessScheduler(rate=browser_config.nav_rate, burst=NAVIGATION_BURST, jitter=NAVIGATION_JITTER)
+    
+    if not use_db and not export_dir:
+        print("Running without the database needs an export directory")
+        return False
     
     try:
-        # Initialize database connection
-        connection = create_db_connection()
-        if not connection:
-            return False
+        if use_db:
+            # Initialize database connection
+            connection = create_db_connection()
+            if not connection:
+                return False
+            
+            # Initialize cursor
+            cursor = connection.cursor()
+            ensure_upsert_schema(connection)
+            if metadata_report:
+                ensure_metadata_report(connection)
+            if track_changes:
+                known = KnownServices.load(connection)
         
-        # Initialize cursor
-        cursor = connection.cursor()
+        writer = BatchedWriter(connection, metrics=metrics) if connection else None
+        sink = make_sink(export_format, export_dir) if export_dir else None
+        writer_lock = threading.Lock()
+        browser_fallbacks = 0
+        if http_profiles:
+            enricher = ProfileEnricher(profile_cache, profile_ttl, scheduler=profile_politeness)
         
-        # Initialize Selenium
-        driver = setup_edge_driver()
-        added_count = 0
+        def handle_listing(driver, url, pool):
+            print(f"\n📄 Processing {url}")
+            start = time.perf_counter()
+            cards = extract_listing_cards(driver, url, navigation, metrics)
+            elapsed = time.perf_counter() - start
+            metrics.add_time("listing", elapsed)
+            metrics.observe("listing.latency", elapsed)
+            metrics.count("cards.read", len(cards))
+            if enricher:
+                enricher.sync_cookies(driver)
+            for card in cards:
+                pool.submit(PROFILE_TASK, card)
         
-        # Loop through pages
-        for page in range(1,5):
-            try:
-                print(f"\n📄 Processing page {page} of 39...")
-                url = f"https://www.peopleperhour.com/services/technology-programming/mobile-app-development?page={page}"
-                
-                driver.get(url)
-                time.sleep(5)  # Add initial wait
-                
-                # Wait for freelancer elements
-                freelancer_elements = WebDriverWait(driver, 15).until(
-                    EC.presence_of_all_elements_located(
-                        (By.CSS_SELECTOR, "a.card__user-link⤍HourlieTileMeta⤚F1h11")
-                    )
-                )
-                
-                # Process each freelancer
-                for freelancer in freelancer_elements[:15]:
-                    try:
-                        username = freelancer.find_element(
-                            By.CSS_SELECTOR, "span.card__username⤍HourlieTileMeta⤚1hJNR"
-                        ).text.strip()
-                        
-                        profile_link = freelancer.get_attribute("href")
-                        
-                        # Extract other data
-                        profile_image = freelancer.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-                        rating = freelancer.find_element(
-                            By.CSS_SELECTOR, "span.card__freelancer-ratings⤍HourlieTileMeta⤚1zn5P"
-                        ).text.split()[0]
-                        reviews = freelancer.find_element(
-                            By.CSS_SELECTOR, "span.card__freelancer-reviews⤍HourlieTileMeta⤚HCTu6"
-                        ).text.strip().replace("(", "").replace(")", "")
-                        
-                        # Visit profile page
-                        driver.execute_script("window.open(arguments[0]);", profile_link)
-                        driver.switch_to.window(driver.window_handles[-1])
-                        time.sleep(3)
-                        
-                        try:
-                            description = WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "p.member-job"))
-                            ).text.strip()
-                        except:
-                            description = "Professional Freelancer"
-                        
-                        # Close profile tab and switch back
-                        driver.close()
-                        driver.switch_to.window(driver.window_handles[0])
-                        
-                        # Calculate price and category
-                        price = str(max(15, min(50, int(25 * (1 + float(rating) / 10 + 
-                                 (int(reviews) if reviews.isdigit() else 0) / 200)))))
-                        category = determine_category(description)
-                        
-                        # Use current timestamp instead of random date
-                        created_at = CURRENT_TIMESTAMP
-                        
-                        # Insert into database without checking if it already exists
-                        cursor.execute("""
-                            INSERT INTO freelancers 
-                            (username, profile_link, profile_image, rating, reviews, 
-                             short_description, price, category, created_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (
-                            username, profile_link, profile_image, float(rating),
-                            int(reviews) if reviews.isdigit() else 0,
-                            description, float(price), category, created_at
-                        ))
-                        
-                        added_count += 1
-                        print(f"✅ Added: {username} ({category}) - Created at: {created_at}")
-                        
-                        # Commit every 5 freelancers
-                        if added_count % 5 == 0:
-                            connection.commit()
-                        
-                    except Exception as e:
-                        print(f"⚠️ Error processing freelancer: {str(e)}")
-                        continue
-                
-                # Add delay between pages
-                time.sleep(random.uniform(2, 4))
-                
-            except Exception as e:
-                print(f"⚠️ Error processing page {page}: {str(e)}")
-                continue
-            
-            # Commit at the end of each page
-            connection.commit()
+        def handle_profile(driver, card, pool):
+            nonlocal browser_fallbacks
+            description = None
+            if enricher:
+                start = time.perf_counter()
+                description = enricher.describe(card['profile_link'])
+                metrics.add_time("profile.http", time.perf_counter() - start)
+            if description is None:
+                start = time.perf_counter()
+                description = fetch_profile_description(driver, card['profile_link'], navigation)
+                elapsed = time.perf_counter() - start
+                metrics.add_time("profile.browser", elapsed)
+                metrics.observe("profile.browser_latency", elapsed)
+                metrics.count("profile.browser")
+                if description == DEFAULT_DESCRIPTION:
+                    metrics.count("profile.default_description")
+                if enricher:
+                    with writer_lock:
+                        browser_fallbacks += 1
+                    if description != DEFAULT_DESCRIPTION:
+                        enricher.remember(card['profile_link'], description)
+            row = build_row(card, description, metrics)
+            with writer_lock:
+                if known is not None:
+                    status = known.classify(row[9], *row[2:8])
+                    metrics.count(f"rows.{status}")
+                # On disk first, so a database failure does not lose the row
+                if sink:
+                    with metrics.timer("export"):
+                        sink.add(row)
+                if writer:
+                    writer.add(row)
         
-        # Insert final metadata
-        cursor.execute("""
-            INSERT INTO metadata (last_updated, updated_by, record_count)
-            VALUES (%s, %s, %s)
-        """, (CURRENT_TIMESTAMP, CURRENT_USER, added_count))
+        pool = BrowserPool(
+            {LISTING_TASK: handle_listing, PROFILE_TASK: handle_profile},
+            workers=workers,
+            config=browser_config,
+            priorities={LISTING_TASK: 0, PROFILE_TASK: 1},
+            driver_factory=driver_factory
+        )
+        for page in pages:
+            pool.submit(LISTING_TASK, listing_url(page, base_url))
+        pool.run()
+        print(f"Browser pool: {pool.summary()}")
+        if not pool.completed:
+            print("\n❌ The browser pool did not run every task; nothing recorded in metadata")
+            return False
+        if enricher:
+            print(f"Profiles: {enricher.summary()}, {browser_fallbacks} browser fallbacks")
         
-        connection.commit()
+        if sink:
+            sink.close()
+            print(f"📦 Exported {sink.summary()}")
+        if not writer:
+            success = True
+            return True
+        
+        added_count = finish_import(
+            connection, writer, metrics, CURRENT_USER,
+            report_fields=run_fields(writer, True, enricher, pool) if metadata_report else None,
+            assets_dir=assets_dir
+        )
         print(f"\n✅ Successfully processed and added {added_count} freelancers with current timestamp")
         
+        success = True
         return True
         
     except Exception as e:
         if connection:
             connection.rollback()
         print(f"\n❌ Error during scraping and import: {str(e)}")
+        if sink and sink.rows_written:
+            print(f"📦 {sink.rows_written} scraped records are in {sink.directory}/; load them with load_records.py")
         return False
         
     finally:
+        if sink:
+            sink.close()
+        print(f"⏱️ Slowest stages: {metrics.summary()}")
+        if report_path:
+            metrics.write_report(report_path, **run_fields(writer, success, enricher, pool))
+            print(f"Run report written to {report_path}")
+        if enricher:
+            enricher.save()
         if cursor:
             cursor.close()
         if connection:
             connection.close()
-        if driver:
-            driver.quit()
 
 def determine_category(description):
-    """Your existing determine_category function"""
-    description = description.lower()
-    category_matches = {category: sum(1 for keyword in keywords if keyword in description) 
-                       for category, keywords in categories.items()}
-    max_matches = max(category_matches.values(), default=0)
-    if max_matches > 0:
-        best_categories = [cat for cat, matches in category_matches.items() 
-                         if matches == max_matches]
-        return random.choice(best_categories)
-    return 'web-development'
+    """Best matching category for a description (whole-word keywords, deterministic ties)"""
+    return classifier.classify(description)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape PeoplePerHour freelancers and import them into the database")
+    parser.add_argument("--pages", type=int, default=len(DEFAULT_PAGES), help="Listing pages to crawl")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel browser workers")
+    parser.add_argument("--browser", choices=BROWSERS, help="Browser to drive (default: $SCRAPER_BROWSER)")
+    parser.add_argument("--driver-path", help="WebDriver executable (default: located by Selenium Manager)")
+    parser.add_argument("--no-headless", action="store_true", help="Show the browser windows")
+    parser.add_argument("--nav-rate", type=float,
+                        help=f"Browser navigations per second for all workers together "
+                             f"(default: $SCRAPER_NAV_RATE or {DEFAULT_NAV_RATE}); scale it with --workers")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="Site root, e.g. the address printed by fixture_server.py --site peopleperhour")
+    parser.add_argument("--no-http-profiles", action="store_true",
+                        help="Always open profiles in the browser instead of fetching them over HTTP")
+    parser.add_argument("--profile-cache", default=DEFAULT_CACHE_PATH, help="Profile description cache file")
+    parser.add_argument("--profile-ttl-hours", type=float, default=DEFAULT_TTL / 3600,
+                        help="How long a cached profile description stays valid")
+    parser.add_argument("--export-dir", nargs="?", const=DEFAULT_EXPORT_DIR,
+                        help=f"Also stream every record into rotated files here (default {DEFAULT_EXPORT_DIR}/)")
+    parser.add_argument("--export-format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--assets", nargs="?", const=DEFAULT_ASSET_DIR,
+                        help=f"Store local copies of the profile images here (default {DEFAULT_ASSET_DIR}/)")
+    parser.add_argument("--no-db", action="store_true",
+                        help="Only write export files; import them later with load_records.py")
+    parser.add_argument("--report", default=default_report_path("peopleperhour"),
+                        help="Where to write the JSON run report (timings, counters, histograms)")
+    parser.add_argument("--no-report", action="store_true", help="Do not write a run report")
+    parser.add_argument("--metadata-report", action="store_true",
+                        help="Also store the run report in the metadata row")
+    args = parser.parse_args()
+    
+    browser_config = BrowserConfig()
+    if args.browser:
+        browser_config.browser = args.browser
+    if args.driver_path:
+        browser_config.driver_path = args.driver_path
+    if args.no_headless:
+        browser_config.headless = False
+    if args.nav_rate:
+        browser_config.nav_rate = args.nav_rate
+    
     print("=== FreeLanci.ma Scraper and Importer ===")
     print(f"Current user: {CURRENT_USER}")
-    print(f"Timestamp: {CURRENT_TIMESTAMP}")
+    print(f"Timestamp: {utc_now()} UTC")
     print("=" * 50)
     
-    success = scrape_and_import()
+    success = scrape_and_import(
+        pages=range(1, args.pages + 1),
+        workers=args.workers,
+        browser_config=browser_config,
+        base_url=args.base_url,
+        http_profiles=not args.no_http_profiles,
+        profile_cache=args.profile_cache,
+        profile_ttl=args.profile_ttl_hours * 3600,
+        export_dir=args.export_dir or (DEFAULT_EXPORT_DIR if args.no_db else None),
+        export_format=args.export_format,
+        use_db=not args.no_db,
+        assets_dir=args.assets,
+        report_path=None if args.no_report else args.report,
+        metadata_report=args.metadata_report
+    )
     
     if success:
         print("\n✅ Scraping and import completed successfully!")
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fixture_server import start_fixture_server
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Point create_db_connection() at a fresh SQLite file"""
+    path = str(tmp_path / "freelancima.sqlite3")
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_SQLITE_PATH", path)
+    return path
+
+@pytest.fixture
+def fixture_site(request):
+    """Serve fixtures/<site> for the test; parametrize indirectly with the site name"""
+    server, base_url = start_fixture_server(getattr(request, "param", "khamsat"))
+    yield base_url
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,47 @@
+"""BatchedWriter upserts on SQLite"""
+import pytest
+
+from db import connect
+from db_writer import BatchedWriter
+from schema import ensure_upsert_schema
+
+@pytest.fixture
+def connection(sqlite_db):
+    connection = connect()
+    ensure_upsert_schema(connection)
+    yield connection
+    connection.close()
+
+def _row(key, description, price, created_at):
+    return ("jane", "https://khamsat.com/user/jane", "https://img/jane.jpg", 4.5, 10,
+            description, price, "Web Development", created_at, key, "web-development")
+
+def _stored(connection):
+    cursor = connection.cursor()
+    cursor.execute("SELECT source_key, short_description, price, created_at FROM freelancers ORDER BY source_key")
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def test_upsert_updates_fields_and_keeps_created_at(connection):
+    with BatchedWriter(connection) as writer:
+        writer.add(_row("khamsat:service:1", "Old title", 10, "2025-01-01 00:00:00"))
+        writer.add(_row("khamsat:service:2", "Other", 20, "2025-01-01 00:00:00"))
+
+    with BatchedWriter(connection) as writer:
+        writer.add(_row("khamsat:service:1", "New title", 15, "2025-02-01 00:00:00"))
+
+    assert _stored(connection) == [
+        ("khamsat:service:1", "New title", 15, "2025-01-01 00:00:00"),
+        ("khamsat:service:2", "Other", 20, "2025-01-01 00:00:00"),
+    ]
+    assert writer.written_keys == {"khamsat:service:1"}
+
+def test_flushes_at_row_threshold(connection):
+    writer = BatchedWriter(connection, batch_rows=2)
+    for n in range(5):
+        writer.add(_row(f"khamsat:service:{n}", "Title", 10, "2025-01-01 00:00:00"))
+    assert (writer.flushes, writer.pending) == (2, 1)
+    writer.flush()
+    assert writer.rows_written == 5
+    assert len(_stored(connection)) == 5
@@ -0,0 +1,55 @@
+"""ResponseCache revalidation against the fixture server and offline replay"""
+import asyncio
+
+import pytest
+
+from crawler import build_targets, crawl, fetch_page
+from http_cache import ResponseCache
+
+pytestmark = pytest.mark.parametrize("fixture_site", ["khamsat"], indirect=True)
+
+def _url(base_url):
+    return f"{base_url}/programming/web-development?page=2"
+
+def test_revalidation_returns_none_when_not_modified(fixture_site, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    body = fetch_page(_url(fixture_site), cache=cache)
+    assert body and cache.get(_url(fixture_site)) == body
+    assert "If-Modified-Since" in cache.conditional_headers(_url(fixture_site))
+
+    assert fetch_page(_url(fixture_site), cache=cache) is None
+
+def test_index_survives_save_and_reload(fixture_site, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    body = fetch_page(_url(fixture_site), cache=cache)
+    cache.save()
+
+    reloaded = ResponseCache(str(tmp_path / "cache"))
+    assert reloaded.get(_url(fixture_site)) == body
+    assert reloaded.total_bytes == cache.total_bytes
+
+def test_offline_crawl_replays_cached_pages(fixture_site, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    targets = build_targets(["desktop-app", "mobile-apps"], [1, 2], base_url=fixture_site)
+    online = {}
+    asyncio.run(crawl(targets, lambda target, html: online.update({target.url: html}),
+                      host_rate=1000, cache=cache))
+    assert len(online) == len(targets)
+
+    offline = {}
+    stats = asyncio.run(crawl(targets, lambda target, html: offline.update({target.url: html}),
+                              cache=cache, offline=True))
+    assert offline == online
+    assert (stats.pages_ok, stats.pages_failed) == (len(targets), 0)
+
+    missing = build_targets(["web-development"], [3], base_url=fixture_site)
+    stats = asyncio.run(crawl(missing, lambda target, html: None, cache=cache, offline=True))
+    assert stats.pages_failed == 1
+
+def test_lru_eviction_over_size_limit(fixture_site, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"), max_bytes=1)
+    first, second = (f"{fixture_site}/programming/desktop-app?page={page}" for page in (2, 3))
+    fetch_page(first, cache=cache)
+    fetch_page(second, cache=cache)
+    assert cache.get(first) is None and cache.get(second)
+    assert cache.evictions == 1
@@ -0,0 +1,50 @@
+"""KnownServices classification and incremental Khamsat runs"""
+import json
+
+import pytest
+
+from db import connect
+from db_writer import BatchedWriter
+from incremental import CHANGED, NEW, UNCHANGED, KnownServices
+from khamasat import scrape_and_import_khamsat
+from schema import ensure_upsert_schema
+
+FIELDS = ("https://img/jane.jpg", 4.5, 10, "I will build your site", 25, "Web Development")
+
+def test_classify_remembers_fingerprints():
+    known = KnownServices()
+    assert known.classify("khamsat:service:1", *FIELDS) == NEW
+    assert known.classify("khamsat:service:1", *FIELDS) == UNCHANGED
+    assert known.classify("khamsat:service:1", *FIELDS[:4], 30, FIELDS[5]) == CHANGED
+    assert (known.new, known.changed, known.unchanged) == (1, 1, 1)
+    assert "khamsat:service:1" in known and len(known) == 1
+
+def test_loaded_rows_are_unchanged(sqlite_db):
+    connection = connect()
+    try:
+        ensure_upsert_schema(connection)
+        with BatchedWriter(connection) as writer:
+            writer.add(("jane", "https://khamsat.com/user/jane", FIELDS[0], 4.5, 10, FIELDS[3], 25.0,
+                        FIELDS[5], "2025-01-01 00:00:00", "khamsat:service:1", "web-development"))
+        known = KnownServices.load(connection)
+    finally:
+        connection.close()
+    # Values come back from the database as stored types; the fingerprint must not depend on that
+    assert known.classify("khamsat:service:1", *FIELDS) == UNCHANGED
+    assert known.classify("khamsat:service:2", *FIELDS) == NEW
+
+def _run(base_url, tmp_path, name):
+    report = tmp_path / f"{name}.json"
+    assert scrape_and_import_khamsat(pages=(1, 2, 3), base_url=base_url, host_rate=1000, parse_workers=0,
+                                     cache_dir=None, incremental=True, report_path=str(report))
+    with open(report, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("fixture_site", ["khamsat"], indirect=True)
+def test_second_incremental_run_writes_nothing(fixture_site, sqlite_db, tmp_path):
+    first = _run(fixture_site, tmp_path, "first")
+    assert first["rows_written"] > 0
+
+    second = _run(fixture_site, tmp_path, "second")
+    assert second["rows_written"] == 0
+    assert second["incremental"]["new"] == second["incremental"]["changed"] == 0
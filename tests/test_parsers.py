@@ -0,0 +1,30 @@
+"""Every parser backend extracts the same records as BeautifulSoup from the saved Khamsat pages"""
+import glob
+import os
+
+import pytest
+
+import khamasat
+from parsers import BACKENDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = sorted(glob.glob(os.path.join(ROOT, "fixtures", "khamsat", "**", "*.html"), recursive=True))
+# Fixed, so records from different backends compare equal
+CREATED_AT = "2025-01-01 00:00:00"
+
+def _records(path, backend):
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    return khamasat.parse_listing_page(html, parser=khamasat.make_parser(backend), created_at=CREATED_AT)
+
+@pytest.mark.parametrize("path", PAGES, ids=lambda path: os.path.relpath(path, ROOT))
+@pytest.mark.parametrize("backend", [name for name in BACKENDS if name != "bs4"])
+def test_backend_matches_bs4(backend, path):
+    expected = _records(path, "bs4")
+    assert expected
+    assert _records(path, backend) == expected
+
+def test_records_carry_service_ids():
+    records = [record for path in PAGES for record in _records(path, "lxml")]
+    assert all(record.service_id for record in records)
+    assert all(record.created_at == CREATED_AT for record in records)
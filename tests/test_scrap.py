@@ -0,0 +1,108 @@
+"""scrap.scrape_and_import against the PeoplePerHour fixtures with a stub WebDriver"""
+import sqlite3
+from urllib.parse import urljoin
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+import scrap
+from browser_pool import BrowserConfig
+from politeness import PolitenessScheduler
+
+class StubElement:
+    def __init__(self, tag, driver):
+        self._tag = tag
+        self._driver = driver
+
+    @property
+    def text(self):
+        return self._tag.get_text()
+
+    def get_attribute(self, name):
+        value = self._tag.get(name)
+        if value is not None and name in ("href", "src"):
+            return urljoin(self._driver.current_url, value)
+        return value
+
+    def find_elements(self, by, selector):
+        return [StubElement(tag, self._driver) for tag in self._tag.select(selector)]
+
+    def find_element(self, by, selector):
+        found = self.find_elements(by, selector)
+        if not found:
+            raise NoSuchElementException(selector)
+        return found[0]
+
+class StubDriver(StubElement):
+    """Just enough of a WebDriver for scrap.py: pages come from requests, queries from bs4"""
+
+    def __init__(self):
+        super().__init__(BeautifulSoup("", "html.parser"), self)
+        self.current_url = None
+
+    def get(self, url):
+        self.current_url = url
+        self._tag = BeautifulSoup(requests.get(url, timeout=10).text, "html.parser")
+
+    def get_cookies(self):
+        return []
+
+    def execute_script(self, script):
+        return "stub-browser"
+
+    def quit(self):
+        pass
+
+def _failing_driver(config):
+    raise WebDriverException("no browser here")
+
+def _listing_cards(base_url, pages):
+    """(profile link, card tag) for the cards the scraper reads, straight from the fixture pages"""
+    cards = {}
+    for page in pages:
+        soup = BeautifulSoup(requests.get(scrap.listing_url(page, base_url), timeout=10).text, "html.parser")
+        for tag in soup.select(scrap.CARD_LINK_SELECTOR)[:scrap.CARDS_PER_PAGE]:
+            cards[urljoin(base_url, tag["href"])] = tag
+    return cards
+
+def _run(base_url, tmp_path, driver_factory, **kwargs):
+    return scrap.scrape_and_import(
+        pages=(1, 2), workers=2, browser_config=BrowserConfig(nav_rate=1000), base_url=base_url,
+        profile_cache=str(tmp_path / "profiles.json"), driver_factory=driver_factory, **kwargs
+    )
+
+def _rows(path, query):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(query).fetchall()
+    finally:
+        connection.close()
+
+@pytest.fixture(autouse=True)
+def fast_profiles(monkeypatch):
+    monkeypatch.setattr(scrap, "profile_politeness", PolitenessScheduler(rate=1000, burst=1000, jitter=0))
+
+@pytest.mark.parametrize("fixture_site", ["peopleperhour"], indirect=True)
+def test_scrape_writes_one_row_per_profile(fixture_site, sqlite_db, tmp_path):
+    assert _run(fixture_site, tmp_path, lambda config: StubDriver())
+
+    cards = _listing_cards(fixture_site, (1, 2))
+    rows = _rows(sqlite_db, "SELECT profile_link, username, rating, reviews, short_description, source_key "
+                            "FROM freelancers")
+    assert sorted(row[0] for row in rows) == sorted(cards)
+    assert all(row[5] == scrap.natural_key(row[0]) for row in rows)
+
+    amine = next(row for row in rows if row[0].endswith("/amine-b-1000"))
+    assert amine[1:5] == ("Amine B.", 4.8, 287, "Senior Flutter & React Native mobile app developer")
+    # Cards repeated across pages are written twice and upserted onto one row
+    assert _rows(sqlite_db, "SELECT updated_by, record_count FROM metadata") == [
+        (scrap.CURRENT_USER, 2 * scrap.CARDS_PER_PAGE)]
+
+@pytest.mark.parametrize("fixture_site", ["peopleperhour"], indirect=True)
+def test_scrape_fails_when_no_browser_starts(fixture_site, sqlite_db, tmp_path):
+    assert _run(fixture_site, tmp_path, _failing_driver) is False
+
+    assert _rows(sqlite_db, "SELECT COUNT(*) FROM freelancers") == [(0,)]
+    assert _rows(sqlite_db, "SELECT COUNT(*) FROM metadata") == [(0,)]